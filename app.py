@@ -1,175 +1,1262 @@
 import os
 import time
+
+_PROCESS_STARTED = time.perf_counter()
+
+import importlib
 import sqlite3
 import html
 import hashlib
+import hmac
+import base64
+import csv
 import secrets
 import re
-from datetime import datetime, timezone
-from flask import Flask, render_template_string, request, abort
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from PIL import Image
-import boto3
-from botocore.exceptions import ClientError
-
-# ---------------- Configuration ----------------
-# R2 Credentials
-R2_ACCOUNT_ID = os.getenv("R2_ACCOUNT_ID")
-R2_ACCESS_KEY_ID = os.getenv("R2_ACCESS_KEY_ID")
-R2_SECRET_ACCESS_KEY = os.getenv("R2_SECRET_ACCESS_KEY")
-R2_BUCKET_NAME = os.getenv("R2_BUCKET_NAME")
-
-if not all([R2_ACCOUNT_ID, R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY, R2_BUCKET_NAME]):
-    raise EnvironmentError("R2 environment variables are required.")
+import json
+import random
+import socket
+import struct
+import zlib
+import zipfile
+import atexit
+import functools
+import threading
+import tempfile
+import gzip
+import io
+import fcntl
+import multiprocessing
+import queue
+import shutil
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from collections import OrderedDict
+from contextlib import closing, contextmanager, suppress
+from datetime import datetime, timedelta, timezone
+import click
+from flask import Blueprint, Flask, Request, Response, request, abort, jsonify, redirect, send_file, stream_with_context, url_for
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from werkzeug.formparser import FormDataParser, MultiPartParser, _chunk_iter
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+import pdf_render
 
-UPLOAD_FOLDER = "uploads"
-PDF_FOLDER = "pdfs"
-DATABASE = "lunvex.db"
-
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(PDF_FOLDER, exist_ok=True)
-
-app = Flask(__name__)
-app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
-app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16 MB
-
-# Initialize R2 client
-s3_client = boto3.client(
-    's3',
-    endpoint_url=f'https://{R2_ACCOUNT_ID}.r2.cloudflarestorage.com',
-    aws_access_key_id=R2_ACCESS_KEY_ID,
-    aws_secret_access_key=R2_SECRET_ACCESS_KEY,
-    region_name='auto'
-)
-
-# Verify R2 access on startup
 try:
-    s3_client.head_bucket(Bucket=R2_BUCKET_NAME)
-    print("✅ R2 bucket is accessible")
-except ClientError as e:
-    raise EnvironmentError(f"R2 bucket access failed: {e}")
-
-# ---------------- Agreements ----------------
-TEAM_AGREEMENT_TEXT = """LUNVEX LABS – CORE TEAM MEMBER AGREEMENT
+    import brotli
+except ImportError:  # optional; pages are still served gzip/identity
+    brotli = None
 
-This legally binding Agreement (“Agreement”) is entered into on [Date] by and between:
-Lunvex Labs, founded by Dewan Efaj Tahamid Rifat (“the Organization”), and [Full Name] (“the Member”).
+class LazyModule:
+    # Imports the module on first attribute access; import_module is guarded by the import lock
+    def __init__(self, name):
+        self._name = name
+        self._module = None
 
-1. ENGAGEMENT
-You are appointed as a Core Team Member in your declared Niche and Specialization. This is an indefinite, performance-based engagement.
+    def load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
 
-2. CONFIDENTIALITY
-All non-public information (technical, strategic, or operational) is strictly confidential. Unauthorized disclosure constitutes grounds for immediate termination and legal action.
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
 
-3. INTELLECTUAL PROPERTY
-All work product, code, designs, or research created during your tenure is the sole and exclusive property of Lunvex Labs.
+# Heavy libraries load on first use (or in the warm-up thread), not at import
+Image = LazyModule("PIL.Image")
+botocore_exceptions = LazyModule("botocore.exceptions")
 
-4. COMPENSATION
-This role is performance-driven. No fixed salary is provided. Rewards (bonuses, equity, or commissions) are discretionary and based on measurable impact.
-
-5. TERMINATION
-- You may resign with 14 days’ written notice.
-- Lunvex Labs reserves the right to terminate immediately for breach of conduct, inactivity (>14 days), or security violations.
+# ---------------- Configuration ----------------
+# R2 Credentials
+R2_ACCOUNT_ID = os.getenv("R2_ACCOUNT_ID")
+R2_ACCESS_KEY_ID = os.getenv("R2_ACCESS_KEY_ID")
+R2_SECRET_ACCESS_KEY = os.getenv("R2_SECRET_ACCESS_KEY")
+R2_BUCKET_NAME = os.getenv("R2_BUCKET_NAME")
 
-6. PROFESSIONAL CONDUCT
-All communication must occur via official Lunvex Labs channels (e.g., verified Telegram: @EfajTahamidRIFAT). Unprofessional behavior is not tolerated.
+# Runtime paths are resolved at import: the atexit flushes (metrics, backups) may run after
+# the working directory has changed, and must not write somewhere else then
+PDF_FOLDER = pdf_render.PDF_FOLDER
+DATABASE = os.path.abspath("lunvex.db")
+
+# SQLite connection tuning
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(128 * 1024 * 1024)))
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")  # NORMAL is durable across app crashes in WAL mode
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "64"))
+
+# Group commit: applicant inserts are queued to one writer thread and committed together
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "64"))
+GROUP_COMMIT_MAX_WAIT_MS = float(os.getenv("GROUP_COMMIT_MAX_WAIT_MS", "2"))
+GROUP_COMMIT_TIMEOUT = float(os.getenv("GROUP_COMMIT_TIMEOUT", "30"))  # seconds a caller waits for its commit
+
+# Background job pipeline
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "6"))
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", "2"))
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", "300"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+
+# Uploads are spooled in memory and only spill to disk above this size
+UPLOAD_SPOOL_MAX_BYTES = int(os.getenv("UPLOAD_SPOOL_MAX_BYTES", str(2 * 1024 * 1024)))
+
+# Per-field limits, enforced while the multipart body streams in
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(5 * 1024 * 1024)))
+FILE_FIELD_LIMITS = {"photo": UPLOAD_MAX_BYTES, "signature": UPLOAD_MAX_BYTES}
+TEXT_FIELD_LIMITS = {
+    "csrf_token": 256,
+    "upload_id": 64,
+    "name": 400,
+    "email": 400,
+    "role": 32,
+    "niche": 200,
+    "sector": 200,
+    "subsector": 200,
+    "socials": 400,
+    "agreement": 8,
+    "unpaid_ack": 8,
+}
+TEXT_FIELD_DEFAULT_LIMIT = 1024
+MULTIPART_MAX_PARTS = 32
+MULTIPART_CHUNK_SIZE = 16 * 1024
+IMAGE_SIGNATURES = {b"\xff\xd8\xff": "JPEG", b"\x89PNG\r\n\x1a\n": "PNG"}
+IMAGE_SIGNATURE_BYTES = max(len(sig) for sig in IMAGE_SIGNATURES)
+IMAGE_CONTENT_TYPES = {"image/jpeg": "JPEG", "image/png": "PNG"}
+
+# Direct browser uploads: /apply/uploads hands out presigned PUT URLs so image bytes never pass
+# through the workers. Needs a backend that can presign (r2, write-behind) and bucket CORS for PUT.
+DIRECT_UPLOADS = os.getenv("DIRECT_UPLOADS", "0") == "1"
+DIRECT_UPLOAD_TTL = int(os.getenv("DIRECT_UPLOAD_TTL", "900"))
+
+# Admin API (disabled unless a token is configured)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+ADMIN_PAGE_MAX = 500
+SEARCH_RESULTS_MAX = 100
+SEARCH_TERMS_MAX = 8
+# Applicants that predate the search index are indexed this many rows per transaction
+SEARCH_BACKFILL_CHUNK = int(os.getenv("SEARCH_BACKFILL_CHUNK", "500"))
+SEARCH_BACKFILL_PAUSE = float(os.getenv("SEARCH_BACKFILL_PAUSE", "0.02"))
+
+# Pre-rendered static pages
+STATIC_PAGE_MAX_AGE = int(os.getenv("STATIC_PAGE_MAX_AGE", "300"))
+
+# Niche taxonomy: read from a JSON file, re-read when it changes, and fetched by browsers from a
+# content-hashed URL they may cache forever
+TAXONOMY_FILE = os.getenv("TAXONOMY_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "taxonomy.json"))
+TAXONOMY_RELOAD_INTERVAL = float(os.getenv("TAXONOMY_RELOAD_INTERVAL", "5"))
+
+# Object storage: r2, local (LOCAL_STORAGE_FOLDER), memory (single process only) or
+# write-behind (local disk first, drained to R2 in the background)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "r2")
+LOCAL_STORAGE_FOLDER = os.getenv("LOCAL_STORAGE_FOLDER", "storage")
+WRITE_BEHIND_FOLDER = os.getenv("WRITE_BEHIND_FOLDER", "write-behind")
+WRITE_BEHIND_WORKERS = int(os.getenv("WRITE_BEHIND_WORKERS", "4"))
+WRITE_BEHIND_RETRY_MAX = float(os.getenv("WRITE_BEHIND_RETRY_MAX", "60"))
+
+# R2 transfers
+R2_MAX_POOL_CONNECTIONS = int(os.getenv("R2_MAX_POOL_CONNECTIONS", "32"))
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "8"))
+UPLOAD_MULTIPART_THRESHOLD = int(os.getenv("UPLOAD_MULTIPART_THRESHOLD", str(16 * 1024 * 1024)))
+UPLOAD_MULTIPART_CHUNK_SIZE = int(os.getenv("UPLOAD_MULTIPART_CHUNK_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", "4"))
+UPLOAD_BACKOFF_BASE = float(os.getenv("UPLOAD_BACKOFF_BASE", "0.2"))
+
+# DB replication: each instance writes under its own prefix
+INSTANCE_ID = os.getenv("INSTANCE_ID") or socket.gethostname()
+BACKUP_FOLDER = os.path.abspath("backups")
+BACKUP_DEBOUNCE_SECONDS = float(os.getenv("BACKUP_DEBOUNCE_SECONDS", "10"))
+BACKUP_FULL_EVERY = int(os.getenv("BACKUP_FULL_EVERY", "100"))  # deltas between full snapshots
+BACKUP_FULL_INTERVAL = float(os.getenv("BACKUP_FULL_INTERVAL", "21600"))
+
+# Content-addressed images. Scoped per instance because each instance's local index is what
+# the garbage collector trusts; within an instance identical bytes are stored once.
+BLOB_PREFIX = f"blobs/{INSTANCE_ID}/"
+BLOB_EXTENSIONS = {"JPEG": "jpg", "PNG": "png"}
+BLOB_GC_GRACE_SECONDS = float(os.getenv("BLOB_GC_GRACE_SECONDS", str(24 * 3600)))
+
+# Bundle mode: a submission's PDFs, images and metadata go up as one stored ZIP whose member
+# index rides in the object's metadata (and the archive comment, for backends without metadata)
+SUBMISSION_BUNDLES = os.getenv("SUBMISSION_BUNDLES", "0") == "1"
+BUNDLE_NAME = "bundle.zip"
+BUNDLE_INDEX_METADATA = "bundle-index"
+BUNDLE_TAIL_BYTES = 4096
+
+# Receipt downloads: a size-bounded disk LRU shared by the workers sits in front of storage,
+# and unknown ids are remembered so scans never turn into storage GETs. The size bound covers
+# the whole folder, not each worker.
+RECEIPT_CACHE_FOLDER = os.getenv("RECEIPT_CACHE_FOLDER", "receipt-cache")
+RECEIPT_CACHE_MAX_BYTES = int(os.getenv("RECEIPT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+RECEIPT_MAX_AGE = int(os.getenv("RECEIPT_MAX_AGE", "3600"))
+RECEIPT_NEGATIVE_TTL = float(os.getenv("RECEIPT_NEGATIVE_TTL", "300"))
+RECEIPT_NEGATIVE_ENTRIES = 10000
+RECEIPT_PENDING_RETRY = 15  # seconds before asking again for a receipt still being processed
+RECEIPT_FETCH_TIMEOUT = 30
+
+# Metrics: each process snapshots to its own file; /metrics sums them all
+METRICS_FOLDER = os.path.abspath(os.getenv("METRICS_FOLDER", "metrics"))
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Bulk PDF regeneration
+REGEN_CHECKPOINT = os.path.join(BACKUP_FOLDER, "regen-checkpoint.json")
+REGEN_BATCH_SIZE = 500
+
+# Form protection: signed CSRF tokens and a per-client token bucket on POST /apply
+SECRET_KEY = os.getenv("SECRET_KEY")
+SECRET_KEY_FILE = "secret.key"  # generated once and shared by every worker when SECRET_KEY is unset
+CSRF_TOKEN_TTL = int(os.getenv("CSRF_TOKEN_TTL", str(2 * 3600)))
+RATE_LIMIT_DATABASE = "ratelimit.db"
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "6"))  # 0 disables the limiter
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "5"))
+PROXY_HOPS = int(os.getenv("PROXY_HOPS", "0"))  # trusted proxies in front, for X-Forwarded-For
+
+# Startup
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "1") == "1"
+READY_CHECK_TTL = float(os.getenv("READY_CHECK_TTL", "15"))
+
+class UploadRejected(BadRequest):
+    # Raised mid-parse; the rest of the request body is never read
+    def __init__(self, reason, message, code=400):
+        super().__init__(message)
+        self.reason = reason
+        self.code = code
+
+class GuardedUpload:
+    # Spooled file part that enforces its size limit and image signature and hashes on write
+    def __init__(self, field, limit, spool):
+        self.field = field
+        self.limit = limit
+        self.size = 0
+        self.kind = None
+        self._head = b""
+        self._hash = hashlib.sha256()
+        self._spool = spool
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.size > self.limit:
+            raise UploadRejected("file_too_large", f"{self.field.capitalize()} exceeds {self.limit / 2**20:g}MB.", 413)
+        if self.kind is None:
+            self._head += chunk[:IMAGE_SIGNATURE_BYTES]
+            if len(self._head) >= IMAGE_SIGNATURE_BYTES:
+                self._check_signature()
+        self._hash.update(chunk)
+        return self._spool.write(chunk)
+
+    def _check_signature(self):
+        self.kind = next((kind for sig, kind in IMAGE_SIGNATURES.items() if self._head.startswith(sig)), None)
+        if self.kind is None:
+            raise UploadRejected("not_an_image", "Only JPG/PNG allowed.")
+
+    def finish(self):
+        if self.kind is None:
+            self._check_signature()  # part ended before the signature was complete
+        self._spool.seek(0)
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    def __getattr__(self, attr):
+        return getattr(self._spool, attr)
+
+class PortalMultiPartParser(MultiPartParser):
+    def start_file_streaming(self, event, total_content_length):
+        limit = FILE_FIELD_LIMITS.get(event.name)
+        if limit is None:
+            raise UploadRejected("unexpected_file", "Unexpected file upload.")
+        return GuardedUpload(event.name, limit, super().start_file_streaming(event, total_content_length))
+
+    def parse(self, stream, boundary, content_length):
+        # Werkzeug's loop (3.1), with each field checked as soon as it completes: the form sends
+        # csrf_token first, so a forged or expired token is refused before any file part is read
+        decoder = MultipartDecoder(boundary, max_form_memory_size=self.max_form_memory_size, max_parts=self.max_form_parts)
+        fields, files = [], []
+        csrf_checked = False
+        applicant = {}
+        for data in _chunk_iter(stream.read, self.buffer_size):
+            decoder.receive_data(data)
+            event = decoder.next_event()
+            while not isinstance(event, (Epilogue, NeedData)):
+                if isinstance(event, Field):
+                    part, container, field_size = event, [], 0
+                elif isinstance(event, File):
+                    if not csrf_checked:
+                        raise UploadRejected("csrf", "This form has expired. Please reload the page and submit again.")
+                    part, container, field_size = event, self.start_file_streaming(event, content_length), None
+                elif isinstance(event, Data):
+                    if field_size is not None:
+                        field_size += len(event.data)
+                        if field_size > TEXT_FIELD_LIMITS.get(part.name, TEXT_FIELD_DEFAULT_LIMIT):
+                            raise UploadRejected("field_too_large", "A form field is too long.", 413)
+                        container.append(event.data)
+                    else:
+                        container.write(event.data)
+                    if not event.more_data:
+                        if field_size is not None:
+                            value = b"".join(container).decode(self.get_part_charset(part.headers), "replace")
+                            if part.name == "csrf_token":
+                                if not verify_csrf_token(value):
+                                    raise UploadRejected("csrf", "This form has expired. Please reload the page and submit again.")
+                                csrf_checked = True
+                            elif part.name in ("email", "role") and not files:
+                                # ...and so do email and role, so a resubmission is refused before its images stream in
+                                applicant[part.name] = value
+                                if len(applicant) == 2 and applicant_keys.exists(normalize_email(applicant["email"]), applicant["role"]):
+                                    metrics.inc("lunvex_submission_duplicates_total", detected_by="parser")
+                                    raise UploadRejected("duplicate", "Already applied for this pathway.")
+                            fields.append((part.name, value))
+                        else:
+                            container.finish()
+                            files.append((part.name, FileStorage(container, part.filename, part.name, headers=part.headers)))
+                event = decoder.next_event()
+        return self.cls(fields), self.cls(files)
+
+class PortalFormDataParser(FormDataParser):
+    def _parse_multipart(self, stream, mimetype, content_length, options):
+        # The decoder applies max_form_memory_size to its raw buffer too, so it only caps text parts
+        # at two chunks; the exact per-field limits are enforced by the parse loop as data arrives
+        parser = PortalMultiPartParser(
+            stream_factory=self.stream_factory,
+            max_form_memory_size=2 * MULTIPART_CHUNK_SIZE,
+            max_form_parts=MULTIPART_MAX_PARTS,
+            cls=self.cls,
+            buffer_size=MULTIPART_CHUNK_SIZE,
+        )
+        boundary = options.get("boundary", "").encode("ascii")
+        if not boundary:
+            raise ValueError("Missing boundary")
+        form, files = parser.parse(stream, boundary, content_length)
+        return stream, form, files
+
+class PortalRequest(Request):
+    form_data_parser_class = PortalFormDataParser
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_BYTES, mode="rb+")
+
+# ---------------- Metrics ----------------
+METRIC_HELP = {
+    "lunvex_stage_duration_seconds": ("histogram", "Time spent in each stage of the submission path."),
+    "lunvex_submissions_accepted_total": ("counter", "Submissions committed and queued for processing."),
+    "lunvex_submission_rejections_total": ("counter", "Submissions rejected before commit, by reason."),
+    "lunvex_taxonomy_reloads_total": ("counter", "Times a changed taxonomy file was loaded."),
+    "lunvex_blob_uploads_total": ("counter", "Submission images by whether the blob store already held them."),
+    "lunvex_submission_duplicates_total": ("counter", "Resubmissions for an existing (email, role), by where they were caught."),
+    "lunvex_group_commits_total": ("counter", "Transactions committed by the group-commit writer."),
+    "lunvex_group_commit_items_total": ("counter", "Writes carried by group commits, by outcome."),
+}
 
-7. NO GUARANTEE OF SELECTION
-Submission of this application is strictly preliminary and non-binding. It does not constitute acceptance, selection, or any obligation on the part of Lunvex Labs.
+def _label(**labels):
+    return ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+
+class Metrics:
+    # Per-process histograms and counters. Snapshots land in folder/<pid>-<token>.json and
+    # /metrics sums every file, so gunicorn-style worker pools report as one service.
+    def __init__(self, folder, buckets):
+        self.folder = folder
+        self.buckets = buckets
+        self.path = os.path.join(folder, f"{os.getpid()}-{secrets.token_hex(4)}.json")
+        self._lock = threading.Lock()
+        self._histograms = {}  # stage -> [bucket counts..., +Inf count, sum]
+        self._counters = {}    # metric -> {labels: value}
+        self._dirty = False
+        self._flusher = None
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # Process-pool children must not write into the parent's snapshot file
+        self.path = os.path.join(self.folder, f"{os.getpid()}-{secrets.token_hex(4)}.json")
+        self._lock = threading.Lock()
+        self._histograms, self._counters = {}, {}
+        self._dirty = False
+        self._flusher = None
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            hist = self._histograms.setdefault(stage, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    hist[i] += 1
+                    break
+            else:
+                hist[len(self.buckets)] += 1
+            hist[-1] += seconds
+            self._mark_dirty()
+
+    @contextmanager
+    def time(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def inc(self, metric, amount=1, **labels):
+        with self._lock:
+            series = self._counters.setdefault(metric, {})
+            key = _label(**labels)
+            series[key] = series.get(key, 0) + amount
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(METRICS_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except OSError:
+                app.logger.exception("Metrics flush failed")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "histograms": {k: list(v) for k, v in self._histograms.items()},
+                "counters": {k: dict(v) for k, v in self._counters.items()},
+            }
 
-8. NON-INVESTOR STATUS
-Applicants acknowledge that participation does not confer equity, ownership, or investor rights. Investment opportunities are separate and require direct qualification.
+    def flush(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        _write_json_atomic(self.path, self.snapshot())
+
+    def collect(self):
+        # Own state comes from memory; siblings from their last snapshot
+        self._retire_dead()
+        merged = self.snapshot()
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if not name.endswith(".json") or path == self.path:
+                continue
+            try:
+                with open(path) as f:
+                    _merge_snapshot(merged, json.load(f))
+            except (OSError, ValueError):
+                continue  # vanished mid-retire or half-written by a foreign tool
+        return merged
+
+    def _retire_dead(self):
+        # Folds exited processes into retired.json so counters stay monotonic and files stay few
+        for name in os.listdir(self.folder):
+            pid = name.split("-", 1)[0]
+            if not (name.endswith(".json") and pid.isdigit()) or _pid_alive(int(pid)):
+                continue
+            claimed = os.path.join(self.folder, f"{name}.retiring-{os.getpid()}")
+            try:
+                os.rename(os.path.join(self.folder, name), claimed)  # only one collector wins
+            except FileNotFoundError:
+                continue
+            with open(os.path.join(self.folder, "retired.lock"), "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                retired_path = os.path.join(self.folder, "retired.json")
+                retired = {"histograms": {}, "counters": {}}
+                if os.path.exists(retired_path):
+                    with open(retired_path) as f:
+                        retired = json.load(f)
+                with open(claimed) as f:
+                    _merge_snapshot(retired, json.load(f))
+                _write_json_atomic(retired_path, retired)
+            os.remove(claimed)
+
+    def render(self):
+        # Prometheus text exposition format 0.0.4
+        merged = self.collect()
+        lines = []
+        name = "lunvex_stage_duration_seconds"
+        lines += [f"# HELP {name} {METRIC_HELP[name][1]}", f"# TYPE {name} histogram"]
+        for stage, hist in sorted(merged["histograms"].items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, hist):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            cumulative += hist[len(self.buckets)]
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {hist[-1]:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {cumulative}')
+        for name, (kind, help_text) in METRIC_HELP.items():
+            if kind != "counter":
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            series = merged["counters"].get(name) or {"": 0}
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+def _merge_snapshot(into, snap):
+    for stage, hist in snap.get("histograms", {}).items():
+        if stage in into["histograms"]:
+            into["histograms"][stage] = [a + b for a, b in zip(into["histograms"][stage], hist)]
+        else:
+            into["histograms"][stage] = list(hist)
+    for metric, series in snap.get("counters", {}).items():
+        target = into["counters"].setdefault(metric, {})
+        for labels, value in series.items():
+            target[labels] = target.get(labels, 0) + value
+
+def _write_json_atomic(path, payload):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+metrics = Metrics(METRICS_FOLDER, STAGE_BUCKETS)
+atexit.register(metrics.flush)
+
+# ---------------- Storage Backends ----------------
+class ObjectMissing(KeyError):
+    pass
+
+class Storage:
+    # Backends share one interface so uploads, replication and reads never name the store
+    name = "storage"
+    can_presign = False
+
+    def presign_put(self, key, content_type, size, sha256, expires):
+        raise NotImplementedError(f"{self.name} storage cannot presign uploads")
+
+    def check_config(self):
+        # Raises when the backend cannot work at all; create_app calls it so a bad deploy never boots
+        pass
+
+    def start(self):
+        pass
+
+    def warm(self):
+        pass
+
+    def durable(self):
+        # The tier whose writes are visible to other instances once put returns
+        return self
+
+    def stats(self):
+        return {"backend": self.name}
+
+class R2Storage(Storage):
+    name = "r2"
+    can_presign = True
+
+    def __init__(self, bucket=None, client=None):
+        self.bucket = bucket or R2_BUCKET_NAME
+        self._client = client
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # Built on first use so importing the app never waits on boto3 or the network
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self.check_config()
+                    import boto3
+                    from botocore.config import Config
+                    self._client = boto3.client(
+                        's3',
+                        endpoint_url=f'https://{R2_ACCOUNT_ID}.r2.cloudflarestorage.com',
+                        aws_access_key_id=R2_ACCESS_KEY_ID,
+                        aws_secret_access_key=R2_SECRET_ACCESS_KEY,
+                        region_name='auto',
+                        config=Config(
+                            max_pool_connections=R2_MAX_POOL_CONNECTIONS,
+                            retries={"max_attempts": 2, "mode": "standard"},
+                            tcp_keepalive=True,
+                        )
+                    )
+        return self._client
+
+    def _missing(self, key, error):
+        if error.response.get("Error", {}).get("Code") in ("NoSuchKey", "404", "NotFound"):
+            return ObjectMissing(key)
+        return error
+
+    def _extra_args(self, content_type, metadata):
+        extra = {"ContentType": content_type} if content_type else {}
+        if metadata:
+            extra["Metadata"] = metadata
+        return extra
+
+    def put_file(self, local_path, key, content_type=None, metadata=None):
+        # The transfer manager switches to a multipart upload above the configured threshold
+        self.client.upload_file(local_path, self.bucket, key, Config=get_transfer_config(),
+                                ExtraArgs=self._extra_args(content_type, metadata))
+
+    def put_fileobj(self, fileobj, key, content_type=None, metadata=None):
+        fileobj.seek(0)
+        self.client.upload_fileobj(fileobj, self.bucket, key, Config=get_transfer_config(),
+                                   ExtraArgs=self._extra_args(content_type, metadata))
+
+    def put_bytes(self, key, data, content_type=None, metadata=None):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **self._extra_args(content_type, metadata))
+
+    def get_bytes(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+        except botocore_exceptions.ClientError as e:
+            raise self._missing(key, e) from e
 
-9. GOVERNING LAW
-This Agreement is governed by the laws of Singapore. Legal notices may be sent via Telegram to @EfajTahamidRIFAT.
-"""
+    def get_range(self, key, start, length):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{start + length - 1}")["Body"].read()
+        except botocore_exceptions.ClientError as e:
+            raise self._missing(key, e) from e
 
-INTERNSHIP_AGREEMENT_TEXT = """LUNVEX LABS – INTERNSHIP AGREEMENT
+    def head(self, key):
+        try:
+            meta = self.client.head_object(Bucket=self.bucket, Key=key)
+        except botocore_exceptions.ClientError as e:
+            raise self._missing(key, e) from e
+        return {"bytes": meta["ContentLength"], "content_type": meta.get("ContentType"),
+                "metadata": meta.get("Metadata", {})}
 
-This educational Agreement (“Agreement”) is entered into on [Date] by and between:
-Lunvex Labs, founded by Dewan Efaj Tahamid Rifat (“the Organization”), and [Full Name] (“the Intern”).
+    def download(self, key, local_path):
+        try:
+            self.client.download_file(self.bucket, key, local_path)
+        except botocore_exceptions.ClientError as e:
+            raise self._missing(key, e) from e
+
+    def presign_put(self, key, content_type, size, sha256, expires):
+        # Type, length and digest are all signed headers: R2 refuses a PUT where any differ
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = self.client.generate_presigned_url("put_object", Params={
+            "Bucket": self.bucket,
+            "Key": key,
+            "ContentType": content_type,
+            "ContentLength": size,
+            "ChecksumSHA256": checksum,
+        }, ExpiresIn=expires)
+        return url, {"Content-Type": content_type, "x-amz-checksum-sha256": checksum}
+
+    def delete(self, keys):
+        keys = list(keys)
+        for start in range(0, len(keys), 1000):  # DeleteObjects takes at most 1000 keys
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": k} for k in keys[start:start + 1000]], "Quiet": True},
+            )
+
+    def check_config(self):
+        if self._client is None and not all([R2_ACCOUNT_ID, R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY, self.bucket]):
+            raise EnvironmentError("R2 environment variables are required.")
+
+    def check(self):
+        self.client.head_bucket(Bucket=self.bucket)
+
+    def warm(self):
+        self.client
+        get_transfer_config()
+
+    def stats(self):
+        return {"backend": self.name, "bucket": self.bucket}
+
+class LocalStorage(Storage):
+    # Keys map to paths under root; writes land in a temp file and are renamed into place
+    name = "local"
+
+    def __init__(self, root, fsync=True):
+        self.root = os.path.abspath(root)
+        self.fsync = fsync
+
+    def path(self, key):
+        parts = key.split("/")
+        if key.startswith("/") or ".." in parts or "" in parts:
+            raise ValueError(f"Invalid storage key: {key!r}")
+        return os.path.join(self.root, *parts)
+
+    def _write(self, key, write):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{secrets.token_hex(4)}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                write(f)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.remove(tmp)
+            raise
+
+    # Content types and metadata are not kept on disk; readers must not depend on them
+
+    def put_file(self, local_path, key, content_type=None, metadata=None):
+        def write(f):
+            with open(local_path, "rb") as src:
+                shutil.copyfileobj(src, f)
+        self._write(key, write)
+
+    def put_fileobj(self, fileobj, key, content_type=None, metadata=None):
+        fileobj.seek(0)
+        self._write(key, lambda f: shutil.copyfileobj(fileobj, f))
+
+    def put_bytes(self, key, data, content_type=None, metadata=None):
+        self._write(key, lambda f: f.write(data))
+
+    def get_bytes(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError as e:
+            raise ObjectMissing(key) from e
 
-1. TERM
-5-month unpaid internship from [Start Date] to [End Date]. Extension is at the Organization’s sole discretion.
+    def get_range(self, key, start, length):
+        try:
+            with open(self.path(key), "rb") as f:
+                f.seek(start)
+                return f.read(length)
+        except FileNotFoundError as e:
+            raise ObjectMissing(key) from e
 
-2. PURPOSE
-Hands-on mentorship in your chosen Niche and Specialization to build real-world skills.
+    def head(self, key):
+        try:
+            return {"bytes": os.path.getsize(self.path(key)), "content_type": None, "metadata": {}}
+        except FileNotFoundError as e:
+            raise ObjectMissing(key) from e
 
-3. CONFIDENTIALITY
-All internal materials, tools, and communications are confidential. Disclosure is prohibited during and after the internship.
+    def download(self, key, local_path):
+        try:
+            shutil.copyfile(self.path(key), local_path)
+        except FileNotFoundError as e:
+            raise ObjectMissing(key) from e
+
+    def delete(self, keys):
+        for key in keys:
+            with suppress(FileNotFoundError):
+                os.remove(self.path(key))
+
+    def check(self):
+        os.makedirs(self.root, exist_ok=True)
+        if not os.access(self.root, os.W_OK):
+            raise PermissionError(f"{self.root} is not writable")
+
+    def warm(self):
+        os.makedirs(self.root, exist_ok=True)
+
+    def stats(self):
+        return {"backend": self.name, "root": self.root}
+
+class MemoryStorage(Storage):
+    # Process-local; for tests, benchmarks and single-process offline runs
+    name = "memory"
+
+    def __init__(self):
+        self.objects = {}
+        self.meta = {}  # key -> (content_type, metadata)
+        self._lock = threading.Lock()
+
+    def put_file(self, local_path, key, content_type=None, metadata=None):
+        with open(local_path, "rb") as f:
+            self.put_bytes(key, f.read(), content_type, metadata)
+
+    def put_fileobj(self, fileobj, key, content_type=None, metadata=None):
+        fileobj.seek(0)
+        self.put_bytes(key, fileobj.read(), content_type, metadata)
+
+    def put_bytes(self, key, data, content_type=None, metadata=None):
+        with self._lock:
+            self.objects[key] = bytes(data)
+            self.meta[key] = (content_type, dict(metadata or {}))
+
+    def get_bytes(self, key):
+        with self._lock:
+            if key not in self.objects:
+                raise ObjectMissing(key)
+            return self.objects[key]
+
+    def get_range(self, key, start, length):
+        return self.get_bytes(key)[start:start + length]
+
+    def head(self, key):
+        with self._lock:
+            if key not in self.objects:
+                raise ObjectMissing(key)
+            content_type, metadata = self.meta[key]
+            return {"bytes": len(self.objects[key]), "content_type": content_type, "metadata": metadata}
+
+    def download(self, key, local_path):
+        with open(local_path, "wb") as f:
+            f.write(self.get_bytes(key))
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self.objects.pop(key, None)
+                self.meta.pop(key, None)
+
+    def check(self):
+        pass
+
+    def stats(self):
+        with self._lock:
+            return {"backend": self.name, "objects": len(self.objects),
+                    "bytes": sum(len(v) for v in self.objects.values())}
+
+class WriteBehindStorage(Storage):
+    # Puts return once the object is on local disk; drainer threads copy it to the remote
+    # tier and then drop the local copy. A marker file per pending key survives restarts, so
+    # anything accepted before a crash is drained by the next process. Every process sharing
+    # the folder rescans the markers, so the files on disk, not _pending, decide what is left:
+    # writes, drains and deletes of a key hold its stripe lock, and a drainer that finds the
+    # marker gone once it has the lock counts the key as drained elsewhere.
+    name = "write-behind"
+    LOCK_STRIPES_HEX = 3  # 4096 lock files
+
+    def __init__(self, folder, remote, workers=4):
+        self.local = LocalStorage(os.path.join(folder, "objects"))
+        self.markers = LocalStorage(os.path.join(folder, "pending"))
+        self.locks = os.path.join(folder, "locks")
+        self.remote = remote
+        self.workers = workers
+        self.stats_counters = {"drained": 0, "drain_failures": 0}
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # Drainer threads do not survive a fork; the child restarts them and rescans markers
+        self._cond = threading.Condition()
+        self._queue = queue.SimpleQueue()
+        self._pending = {}    # key -> marker of the newest local write: generation and put options
+        self._inflight = set()
+        self._failures = {}   # key -> consecutive failed drain attempts
+        self._threads = []
+
+    def _marker(self, key):
+        return f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+    @contextmanager
+    def _locked(self, key):
+        # flock conflicts between open files, so this also excludes other threads of this process
+        os.makedirs(self.locks, exist_ok=True)
+        with open(os.path.join(self.locks, f"{self._marker(key)[:self.LOCK_STRIPES_HEX]}.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _read_marker(self, key):
+        try:
+            return json.loads(self.markers.get_bytes(self._marker(key)))
+        except (ObjectMissing, ValueError):
+            return None
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            self._rescan()
+            for i in range(self.workers):
+                t = threading.Thread(target=self._drain_loop, name=f"write-behind-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _rescan(self):
+        with suppress(FileNotFoundError):
+            for name in os.listdir(self.markers.root):
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    marker = json.loads(self.markers.get_bytes(name))
+                except (ObjectMissing, ValueError):
+                    continue
+                if marker["key"] not in self._pending:
+                    self._pending[marker["key"]] = marker
+                    self._queue.put(marker["key"])
+
+    def _put(self, key, write, content_type, metadata):
+        self.start()
+        marker = {"key": key, "generation": secrets.token_hex(8),
+                  "options": {"content_type": content_type, "metadata": metadata}}
+        # Under the lock so no drainer, in any process, removes these bytes as an older generation
+        with self._locked(key):
+            write()
+            self.markers.put_bytes(self._marker(key), json.dumps(marker).encode())
+        with self._cond:
+            self._pending[key] = marker
+        self._queue.put(key)
+
+    def put_file(self, local_path, key, content_type=None, metadata=None):
+        self._put(key, lambda: self.local.put_file(local_path, key), content_type, metadata)
+
+    def put_fileobj(self, fileobj, key, content_type=None, metadata=None):
+        self._put(key, lambda: self.local.put_fileobj(fileobj, key), content_type, metadata)
+
+    def put_bytes(self, key, data, content_type=None, metadata=None):
+        self._put(key, lambda: self.local.put_bytes(key, data), content_type, metadata)
+
+    def _drain_loop(self):
+        while True:
+            key = self._queue.get()
+            with self._cond:
+                marker = self._pending.get(key)
+                if marker is None or key in self._inflight:
+                    continue  # deleted, or another drainer has it and will see the new generation
+                self._inflight.add(key)
+            try:
+                drained = self._drain_one(key)
+            except Exception:
+                with self._cond:
+                    self._inflight.discard(key)
+                    failures = self._failures[key] = self._failures.get(key, 0) + 1
+                    self.stats_counters["drain_failures"] += 1
+                    self._cond.notify_all()
+                app.logger.warning("Write-behind drain of %s failed (attempt %d)", key, failures, exc_info=True)
+                time.sleep(min(WRITE_BEHIND_RETRY_MAX, UPLOAD_BACKOFF_BASE * 2 ** failures))
+                self._queue.put(key)
+                continue
+            with self._cond:
+                self._inflight.discard(key)
+                self._failures.pop(key, None)
+                if drained:
+                    self.stats_counters["drained"] += 1
+                if self._pending.get(key) is marker:
+                    del self._pending[key]
+                else:
+                    self._queue.put(key)  # rewritten while uploading
+                self._cond.notify_all()
+
+    def _drain_one(self, key):
+        # Uploads the generation on disk, which may be newer than ours or written by another
+        # process; False when the key was already drained or deleted
+        with self._locked(key):
+            marker = self._read_marker(key)
+            if marker is None:
+                return False
+            local_path = self.local.path(key)
+            if not os.path.exists(local_path):
+                self.markers.delete([self._marker(key)])  # left by a crash between the two deletes
+                return False
+            self.remote.put_file(local_path, key, **marker.get("options", {}))
+            self.markers.delete([self._marker(key)])
+            self.local.delete([key])
+            return True
+
+    def get_bytes(self, key):
+        try:
+            return self.local.get_bytes(key)
+        except ObjectMissing:
+            return self.remote.get_bytes(key)
 
-4. UNPAID NATURE
-This is a voluntary, unpaid educational program. No salary, stipend, or benefits are provided. Successful completion yields an Official Certificate.
+    def get_range(self, key, start, length):
+        try:
+            return self.local.get_range(key, start, length)
+        except ObjectMissing:
+            return self.remote.get_range(key, start, length)
 
-5. PATHWAY TO CORE TEAM
-Exceptional performers may receive an invitation to join the Core Team post-internship.
+    def head(self, key):
+        try:
+            return self.local.head(key)
+        except ObjectMissing:
+            return self.remote.head(key)
 
-6. TERMINATION
-Lunvex Labs may terminate for misconduct, absenteeism, or breach. You may withdraw with 7 days’ notice.
+    def download(self, key, local_path):
+        try:
+            self.local.download(key, local_path)
+        except ObjectMissing:
+            self.remote.download(key, local_path)
+
+    @property
+    def can_presign(self):
+        return self.remote.can_presign
+
+    def presign_put(self, key, content_type, size, sha256, expires):
+        # Browser uploads go straight to the remote tier; reads fall through to it
+        return self.remote.presign_put(key, content_type, size, sha256, expires)
+
+    def delete(self, keys):
+        keys = list(keys)
+        with self._cond:
+            for key in keys:
+                self._pending.pop(key, None)
+            self._cond.notify_all()
+        # The lock waits out an upload already under way in any process, which would otherwise
+        # land after the remote delete
+        for key in keys:
+            with self._locked(key):
+                self.markers.delete([self._marker(key)])
+                self.local.delete([key])
+        self.remote.delete(keys)
+
+    def drain(self, timeout=None):
+        self.start()
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending, timeout)
+
+    def check_config(self):
+        self.remote.check_config()
+
+    def check(self):
+        # Requests only need the local tier; a remote outage shows up as a growing backlog
+        self.check_config()
+        self.local.check()
+        self.markers.check()
+
+    def warm(self):
+        self.local.warm()
+        self.remote.warm()
+        self.start()
+
+    def durable(self):
+        return self.remote
+
+    def stats(self):
+        with self._cond:
+            return {
+                "backend": self.name,
+                "remote": self.remote.stats(),
+                "pending": len(self._pending),
+                "inflight": len(self._inflight),
+                "retrying": len(self._failures),
+                **self.stats_counters,
+            }
 
-7. NO GUARANTEE OF SELECTION
-Submission of this application is strictly preliminary and non-binding. It does not constitute acceptance or selection.
+@functools.cache
+def get_transfer_config():
+    # Submission artifacts are small; keep them single-part and let the batch pool provide parallelism
+    from boto3.s3.transfer import TransferConfig
+    return TransferConfig(
+        multipart_threshold=UPLOAD_MULTIPART_THRESHOLD,
+        multipart_chunksize=UPLOAD_MULTIPART_CHUNK_SIZE,
+        max_concurrency=4,
+    )
+
+def build_storage(backend):
+    if backend == "r2":
+        return R2Storage()
+    if backend == "local":
+        return LocalStorage(LOCAL_STORAGE_FOLDER)
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "write-behind":
+        return WriteBehindStorage(WRITE_BEHIND_FOLDER, R2Storage(), WRITE_BEHIND_WORKERS)
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}")
+
+storage = build_storage(STORAGE_BACKEND)
+
+_upload_pool = ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY, thread_name_prefix="storage-upload")
+
+# ---------------- Taxonomy ----------------
+class TaxonomyError(ValueError):
+    pass
+
+def parse_taxonomy(tree):
+    # {niche: {sector: [subsector, ...]}}; an empty list means the sector has no subsectors
+    if not isinstance(tree, dict) or not tree:
+        raise TaxonomyError("taxonomy must be a non-empty object of niches")
+    for niche, sectors in tree.items():
+        if not niche or not isinstance(sectors, dict) or not sectors:
+            raise TaxonomyError(f"niche {niche!r} must map to a non-empty object of sectors")
+        for sector, subsectors in sectors.items():
+            if not sector or not isinstance(subsectors, list):
+                raise TaxonomyError(f"{niche!r} / {sector!r} must map to a list of subsectors")
+            if not all(isinstance(s, str) and s for s in subsectors) or len(set(subsectors)) != len(subsectors):
+                raise TaxonomyError(f"{niche!r} / {sector!r} has empty or repeated subsectors")
+    return tree
+
+class TaxonomySnapshot:
+    # One immutable version: the niche names for the form, every valid (niche, sector, subsector)
+    # triple for validation ("" = not applicable) and the JSON browsers fetch by content hash
+    def __init__(self, tree):
+        self.niches = tuple(tree)
+        self.triples = frozenset(
+            (niche, sector, subsector)
+            for niche, sectors in tree.items()
+            for sector, subsectors in sectors.items()
+            for subsector in ("", *subsectors)
+        )
+        self.page = StaticPage(json.dumps(tree, ensure_ascii=False, separators=(",", ":")))
+        self.version = self.page.etag[:16]
+
+    def rejection(self, niche, sector, subsector):
+        # None for a valid selection, else the rejection reason
+        if (niche, sector, subsector) in self.triples:
+            return None
+        return "invalid_subsector" if (niche, sector, "") in self.triples else "invalid_niche"
+
+class Taxonomy:
+    # Re-stats the file at most every reload_interval seconds and swaps in a new snapshot when it
+    # changed. A broken edit is logged and the previous version keeps serving.
+    def __init__(self, path, reload_interval):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._snapshot = None
+        self._stamp = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def current(self):
+        if time.monotonic() - self._checked_at >= self.reload_interval:
+            self._maybe_reload()
+        return self._snapshot
+
+    def _maybe_reload(self):
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = time.monotonic()
+            try:
+                st = os.stat(self.path)
+                stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+                if stamp == self._stamp:
+                    return
+                with open(self.path, encoding="utf-8") as f:
+                    snapshot = TaxonomySnapshot(parse_taxonomy(json.load(f)))
+            except (OSError, ValueError):
+                if self._snapshot is None:
+                    raise
+                app.logger.exception("Could not reload the taxonomy from %s; keeping version %s",
+                                     self.path, self._snapshot.version)
+                return
+            if self._snapshot is not None:
+                app.logger.info("Taxonomy reloaded: version %s -> %s", self._snapshot.version, snapshot.version)
+                metrics.inc("lunvex_taxonomy_reloads_total")
+            self._snapshot, self._stamp = snapshot, stamp
+
+taxonomy = Taxonomy(TAXONOMY_FILE, TAXONOMY_RELOAD_INTERVAL)
 
-8. NON-INVESTOR STATUS
-Applicants acknowledge that participation does not confer equity, ownership, or investor rights.
+# ---------------- Helpers ----------------
+def reject(reason, message, status=400):
+    metrics.inc("lunvex_submission_rejections_total", reason=reason)
+    return f"<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ {message}</h2>", status
 
-9. GOVERNING LAW
-This Agreement is governed by the laws of Singapore. Legal notices may be sent via Telegram to @EfajTahamidRIFAT.
-"""
+def reject_json(reason, message, status=400):
+    metrics.inc("lunvex_submission_rejections_total", reason=reason)
+    return jsonify({"error": reason, "message": message}), status
 
-NICHES = {
-    "Cybersecurity": {
-        "Penetration Testing": ["Web App Pentesting", "Mobile App Pentesting", "Network Pentesting"],
-        "Bug Bounty & Vulnerability Research": ["Web Vulnerabilities", "Mobile Vulnerabilities", "Blockchain Audits"],
-    },
-    "Web Development": {
-        "Frontend Development": ["React", "Vue.js", "Svelte"],
-        "Backend Development": ["Node.js", "Django", "Flask"],
-    },
-}
+def normalize_email(value):
+    return html.escape(value.strip()[:100].lower())
 
-# ---------------- Helpers ----------------
 def is_valid_github_url(url):
     if not url or not url.startswith("https://github.com/"):
         return False
     pattern = r"^https://github\.com/([a-zA-Z0-9_-]+)(/?)$"
     return bool(re.fullmatch(pattern, url.strip()))
 
-def secure_filename_custom(filename):
-    safe = "".join(c for c in filename if c.isalnum() or c in "._- ")
-    return safe.strip().replace(' ', '_') or "file"
+class LRUCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'png', 'jpg', 'jpeg'}
 
-def save_uploaded_file(file, prefix):
-    if not file or not file.filename:
-        raise ValueError("No file")
-    orig = secure_filename_custom(file.filename)
-    path = os.path.join(app.config["UPLOAD_FOLDER"], f"{prefix}_{int(time.time())}_{orig}")
-    file.save(path)
-    return path
-
 def is_valid_image(fp):
+    # Accepts a path or a file object; file objects are rewound for the upload that follows
     try:
+        if hasattr(fp, "seek"):
+            fp.seek(0)
         with Image.open(fp) as img:
             return img.format in ('JPEG', 'PNG')
     except:
         return False
-
-def upload_to_r2(local_path, r2_key):
-    s3_client.upload_file(local_path, R2_BUCKET_NAME, r2_key)
-
-def backup_db_to_r2():
-    upload_to_r2(DATABASE, f"backups/{DATABASE}")
+    finally:
+        if hasattr(fp, "seek"):
+            fp.seek(0)
+
+class BatchUploadError(Exception):
+    def __init__(self, report):
+        failed = [r["key"] for r in report["objects"] if not r["ok"]]
+        super().__init__(f"Batch upload failed for {', '.join(failed)}")
+        self.report = report
+
+def _source_size(source):
+    if isinstance(source, str):
+        return os.path.getsize(source)
+    source.seek(0, os.SEEK_END)
+    return source.tell()
+
+def _upload_with_retry(source, key, options=None):
+    started = time.perf_counter()
+    result = {"key": key, "bytes": None}
+    try:
+        result["bytes"] = _source_size(source)
+    except (OSError, ValueError) as e:
+        # A missing or closed source will not appear on retry; report it so the batch rolls back
+        result.update(ok=False, attempts=0, error=str(e), seconds=round(time.perf_counter() - started, 4))
+        return result
+    for attempt in range(1, UPLOAD_MAX_ATTEMPTS + 1):
+        try:
+            with metrics.time("storage_put"):
+                if isinstance(source, str):
+                    storage.put_file(source, key, **(options or {}))
+                else:
+                    storage.put_fileobj(source, key, **(options or {}))
+            result.update(ok=True, attempts=attempt)
+            break
+        except Exception as e:
+            result.update(ok=False, attempts=attempt, error=str(e))
+            if attempt < UPLOAD_MAX_ATTEMPTS:
+                time.sleep(random.uniform(0, UPLOAD_BACKOFF_BASE * 2 ** (attempt - 1)))
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+def upload_many(objects, rollback=True):
+    # objects: [(local_path or file object, key[, {"content_type", "metadata"}]), ...];
+    # all-or-nothing, returns a per-object report
+    started = time.perf_counter()
+    futures = [_upload_pool.submit(_upload_with_retry, *obj) for obj in objects]
+    results = [f.result() for f in futures]
+    report = {
+        "ok": all(r["ok"] for r in results),
+        "objects": results,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+    if not report["ok"]:
+        uploaded = [r["key"] for r in results if r["ok"]] if rollback else []
+        if uploaded:
+            try:
+                storage.delete(uploaded)
+            except Exception:
+                app.logger.exception("Rollback of partial batch upload failed")
+        report["rolled_back"] = uploaded
+        raise BatchUploadError(report)
+    return report
+
+def backup_db():
+    # Debounced: a burst of submissions produces a single snapshot upload
+    db_replicator.request_backup()
 
 # ---------------- Database ----------------
-def init_db():
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    c.execute("""
+# Schema changes are numbered migrations tracked in PRAGMA user_version. Each one runs in its own
+# BEGIN IMMEDIATE transaction and must stay short (DDL, small updates): anything that touches
+# every row is done afterwards in chunks so the submit path never waits behind it.
+def _migrate_baseline(conn):
+    # The schema as it stood before migrations; IF NOT EXISTS adopts databases created back then
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS applicants (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             submission_id TEXT UNIQUE NOT NULL,
@@ -187,125 +1274,1477 @@ def init_db():
             UNIQUE(email, role)
         )
     """)
-    conn.commit()
-    conn.close()
+    # Outbox: post-insert work is queued in the same transaction as the applicant row
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            submission_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued' CHECK(status IN ('queued', 'running', 'done', 'failed')),
+            stage TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            run_after REAL NOT NULL,
+            locked_until REAL,
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, run_after)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_submission ON jobs(submission_id)")
+    # Admin listing, newest first by (applied_at, id); the rowid (id) is implicit in every index.
+    # No filter (or only from/to) and role alone are range scans, as is any leading prefix of
+    # (niche, sector, subsector). Other combinations (sector or subsector alone, role with a
+    # taxonomy filter) seek on one index and filter or sort the rest.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_applicants_applied ON applicants(applied_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_applicants_role_applied ON applicants(role, applied_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_applicants_taxonomy ON applicants(niche, sector, subsector, applied_at)")
+    # Local index of content-addressed blobs in R2; refcount is bumped in the applicant's transaction
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha256 TEXT PRIMARY KEY,
+            r2_key TEXT NOT NULL,
+            bytes INTEGER NOT NULL,
+            refcount INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            last_ref_at TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_blobs_unreferenced ON blobs(refcount, created_at)")
+    # Presigned uploads not yet claimed by a submission; expired ones are swept by gc-blobs
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS upload_grants (
+            upload_id TEXT NOT NULL,
+            field TEXT NOT NULL,
+            r2_key TEXT NOT NULL,
+            sha256 TEXT NOT NULL,
+            bytes INTEGER NOT NULL,
+            content_type TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (upload_id, field)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_upload_grants_expiry ON upload_grants(expires_at)")
+
+def _migrate_applicant_search(conn):
+    # External-content index over a view, so the GitHub URL is indexed as just the handle and a
+    # search for "github" or "https" does not match everyone. Rows that exist now are indexed by
+    # backfill_search_index(); the triggers cover everything inserted from here on, and only
+    # touch older rows once the backfill has reached them.
+    handle = "trim(replace({}.github_url, 'https://github.com/', ''), '/')"
+    conn.execute(f"CREATE VIEW applicant_search AS SELECT id, name, email, {handle.format('applicants')} AS github FROM applicants")
+    conn.execute("""
+        CREATE VIRTUAL TABLE applicants_fts USING fts5(
+            name, email, github,
+            content='applicant_search', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    """)
+    # Name matches outrank email matches, which outrank the GitHub handle
+    conn.execute("INSERT INTO applicants_fts(applicants_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 2.0)')")
+    conn.execute("""
+        CREATE TABLE search_backfill (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            high INTEGER NOT NULL,
+            done_through INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT INTO search_backfill VALUES (1, (SELECT IFNULL(MAX(id), 0) FROM applicants), 0)")
+    indexed = "old.id <= (SELECT done_through FROM search_backfill) OR old.id > (SELECT high FROM search_backfill)"
+    index_new = f"""
+        INSERT INTO applicants_fts(rowid, name, email, github)
+        VALUES (new.id, new.name, new.email, {handle.format('new')});
+    """
+    drop_old = f"""
+        INSERT INTO applicants_fts(applicants_fts, rowid, name, email, github)
+        VALUES ('delete', old.id, old.name, old.email, {handle.format('old')});
+    """
+    conn.execute(f"CREATE TRIGGER applicants_fts_insert AFTER INSERT ON applicants BEGIN {index_new} END")
+    conn.execute(f"CREATE TRIGGER applicants_fts_delete AFTER DELETE ON applicants WHEN {indexed} BEGIN {drop_old} END")
+    conn.execute(f"""
+        CREATE TRIGGER applicants_fts_update AFTER UPDATE OF name, email, github_url ON applicants
+        WHEN {indexed} BEGIN {drop_old} {index_new} END
+    """)
+
+MIGRATIONS = [
+    (1, "baseline schema", _migrate_baseline),
+    (2, "applicant full-text search", _migrate_applicant_search),
+]
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate_db(path=DATABASE):
+    conn = sqlite3.connect(path, timeout=DB_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        for version, description, apply in MIGRATIONS:
+            if schema_version(conn) >= version:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Re-checked under the write lock: another worker may have just applied it
+                if schema_version(conn) < version:
+                    apply(conn)
+                    conn.execute(f"PRAGMA user_version = {version}")
+                    print(f"🗄️ Applied migration {version}: {description}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return schema_version(conn)
+    finally:
+        conn.close()
+
+# Hot statements, executed by name so each thread's connection reuses the prepared statement
+STATEMENTS = {
+    "insert_applicant": """
+        INSERT INTO applicants
+        (submission_id, name, email, role, niche, sector, subsector, github_url, photo_path, signature_path, agreed, applied_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    "applicant_by_submission": "SELECT * FROM applicants WHERE submission_id = ?",
+    "applicant_by_email_role": "SELECT submission_id FROM applicants WHERE email = ? AND role = ?",
+    "enqueue_job": """
+        INSERT INTO jobs (submission_id, kind, payload, run_after, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """,
+    "next_job": """
+        SELECT * FROM jobs
+        WHERE (status = 'queued' AND run_after <= ?)
+           OR (status = 'running' AND locked_until < ?)
+        ORDER BY run_after, id
+        LIMIT 1
+    """,
+    "lease_job": """
+        UPDATE jobs SET status = 'running', attempts = attempts + 1, locked_until = ?, updated_at = ?
+        WHERE id = ?
+    """,
+    "set_job_stage": "UPDATE jobs SET stage = ?, updated_at = ? WHERE id = ?",
+    "complete_job": """
+        UPDATE jobs SET status = 'done', stage = 'done', locked_until = NULL, last_error = NULL, updated_at = ?
+        WHERE id = ?
+    """,
+    "fail_job": """
+        UPDATE jobs SET status = ?, run_after = ?, locked_until = NULL, last_error = ?, updated_at = ?
+        WHERE id = ?
+    """,
+    "blob_by_hash": "SELECT r2_key FROM blobs WHERE sha256 = ?",
+    "register_blob": """
+        INSERT OR IGNORE INTO blobs (sha256, r2_key, bytes, refcount, created_at) VALUES (?, ?, ?, 0, ?)
+    """,
+    "ref_blob": "UPDATE blobs SET refcount = refcount + 1, last_ref_at = ? WHERE sha256 = ? AND r2_key = ?",
+    "unreferenced_blobs": """
+        SELECT sha256, r2_key, bytes FROM blobs WHERE refcount = 0 AND created_at < ? ORDER BY created_at
+    """,
+    "drop_blob": "DELETE FROM blobs WHERE sha256 = ? AND r2_key = ? AND refcount = 0",
+    "insert_upload_grant": """
+        INSERT INTO upload_grants (upload_id, field, r2_key, sha256, bytes, content_type, expires_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """,
+    "upload_grants": "SELECT field, r2_key, sha256, bytes, content_type FROM upload_grants WHERE upload_id = ? AND expires_at >= ?",
+    "claim_upload_grants": "DELETE FROM upload_grants WHERE upload_id = ? AND expires_at >= ?",
+    "expired_upload_grants": "SELECT upload_id, r2_key FROM upload_grants WHERE expires_at < ?",
+    "drop_upload_grants": "DELETE FROM upload_grants WHERE upload_id = ?",
+    "take_token": """
+        INSERT INTO buckets (client, tokens, updated_at) VALUES (:client, :burst - 1, :now)
+        ON CONFLICT(client) DO UPDATE SET
+            tokens = MIN(:burst, tokens + (:now - updated_at) * :rate) - 1,
+            updated_at = :now
+        WHERE MIN(:burst, tokens + (:now - updated_at) * :rate) >= 1
+        RETURNING tokens
+    """,
+    "prune_buckets": "DELETE FROM buckets WHERE updated_at < ?",
+    "jobs_for_submission": """
+        SELECT kind, status, stage, attempts, created_at, updated_at FROM jobs
+        WHERE submission_id = ? ORDER BY id
+    """,
+    "search_backfill_state": "SELECT done_through, high FROM search_backfill",
+    "search_backfill_chunk": """
+        INSERT INTO applicants_fts (rowid, name, email, github)
+        SELECT id, name, email, github FROM applicant_search WHERE id > ? AND id <= ?
+    """,
+    "search_backfill_advance": "UPDATE search_backfill SET done_through = ?",
+}
+
+class ConnectionManager:
+    # One long-lived connection per thread, opened in WAL mode with tuned pragmas
+    LOCK_WAIT_THRESHOLD = 0.001
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "transactions": 0,
+            "lock_waits": 0,
+            "lock_wait_seconds": 0.0,
+            "lock_timeouts": 0,
+            # Named statements run again/for the first time on this thread's connection; sqlite3's
+            # own cache keeps DB_STATEMENT_CACHE statements per connection and is not observable
+            "statement_reuses": 0,
+            "statement_first_uses": 0,
+        }
+
+    def _bump(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            cached_statements=DB_STATEMENT_CACHE,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+        conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+            self._local.prepared = set()
+            self._bump("connections_opened")
+        else:
+            self._bump("connections_reused")
+        return conn
+
+    def execute(self, name, params=()):
+        conn = self.connection()
+        if name in self._local.prepared:
+            self._bump("statement_reuses")
+        else:
+            self._local.prepared.add(name)
+            self._bump("statement_first_uses")
+        return conn.execute(STATEMENTS[name], params)
+
+    @contextmanager
+    def transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so lock contention is measured here
+        conn = self.connection()
+        started = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            self._bump("lock_timeouts")
+            raise
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self._stats["transactions"] += 1
+            if waited > self.LOCK_WAIT_THRESHOLD:
+                self._stats["lock_waits"] += 1
+                self._stats["lock_wait_seconds"] += waited
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+    def open_reader(self):
+        # Dedicated read-only connection for long scans (exports) so pooled connections stay free
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+        self._bump("connections_opened")
+        return conn
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["lock_wait_seconds"] = round(stats["lock_wait_seconds"], 6)
+        return stats
+
+def is_db_locked(error):
+    # A group commit that timed out means the writer is backed up: the same "busy" to callers
+    return isinstance(error, GroupCommitTimeout) or (
+        isinstance(error, sqlite3.OperationalError) and "locked" in str(error))
+
+db = ConnectionManager(DATABASE)
 
 def get_db():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-# ---------------- PDF Generators ----------------
-def generate_internal_pdf(data, photo_path, signature_path, submission_id):
-    pdf_path = os.path.join(PDF_FOLDER, f"INTERNAL_{submission_id}.pdf")
-    c = canvas.Canvas(pdf_path, pagesize=A4)
-    w, h = A4
-
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(50, h - 50, "Lunvex Labs – Internal Application Record")
-    c.setFont("Helvetica", 10)
-    c.setFillColor(colors.gray)
-    c.drawString(50, h - 70, f"Submission ID: {submission_id} | {data['applied_at']} UTC")
-
-    y = h - 110
-    c.setFont("Helvetica-Bold", 12)
-    c.setFillColor(colors.black)
-    c.drawString(50, y, "APPLICANT DETAILS")
-    y -= 20
-    c.setFont("Helvetica", 11)
-
-    fields = [
-        ("Name", data["name"]),
-        ("Email", data["email"]),
-        ("GitHub", data["github_url"]),
-        ("Role", "Core Team" if data["role"] == "CoreTeam" else "Intern"),
-        ("Niche", data["niche"]),
-        ("Specialization", data["sector"]),
-        ("Sub-Sector", data.get("subsector") or "N/A"),
-    ]
-    for label, val in fields:
-        c.drawString(50, y, f"{label}:")
-        c.drawString(180, y, str(val)[:80])
-        y -= 20
-
-    # Agreement
-    y = y - 20
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, y, "ACCEPTED AGREEMENT")
-    y -= 25
-    c.setFont("Helvetica", 9)
-
-    txt = TEAM_AGREEMENT_TEXT if data["role"] == "CoreTeam" else INTERNSHIP_AGREEMENT_TEXT
-    txt = txt.replace("[Full Name]", data["name"])
-    txt = txt.replace("[Date]", data["applied_at"].split()[0])
-    if data["role"] == "Internship":
-        start = data["applied_at"].split()[0]
-        from datetime import timedelta
-        end = (datetime.fromisoformat(data["applied_at"].replace(' ', 'T')) + timedelta(days=150)).strftime("%Y-%m-%d")
-        txt = txt.replace("[Start Date]", start).replace("[End Date]", end)
-
-    for line in txt.split('\n'):
-        if y < 60:
-            c.showPage()
-            y = h - 50
-        c.drawString(50, y, line[:90])
-        y -= 14
-
-    # Watermark
-    c.saveState()
-    c.setFont("Helvetica", 40)
-    c.setFillColorRGB(0.9, 0.9, 0.9, 0.5)
-    c.drawCentredString(w / 2, h / 2, "CONFIDENTIAL")
-    c.restoreState()
-    c.save()
-    return pdf_path
-
-def generate_receipt_pdf(name, role, email, submission_id):
-    pdf_path = os.path.join(PDF_FOLDER, f"RECEIPT_{submission_id}.pdf")
-    c = canvas.Canvas(pdf_path, pagesize=A4)
-    w, h = A4
-
-    c.setFillColor(colors.Color(0.05, 0.1, 0.2, alpha=0.95))
-    c.rect(0, h - 100, w, 100, fill=1)
-    c.setFillColor(colors.white)
-    c.setFont("Helvetica-Bold", 26)
-    c.drawCentredString(w / 2, h - 50, "LUNVEX LABS")
-    c.setFont("Helvetica", 12)
-    c.setFillColor(colors.Color(0.8, 0.9, 1.0))
-    c.drawCentredString(w / 2, h - 75, "Global Technology Initiative")
-
-    c.setFillColor(colors.black)
-    c.setFont("Helvetica-Bold", 18)
-    c.drawCentredString(w / 2, h - 130, "✅ Application Submitted")
-
-    y = h - 170
-    info = [
-        f"Applicant: {html.escape(name)}",
-        f"Pathway: {'Core Team' if role == 'CoreTeam' else 'Internship'}",
-        f"Email: {html.escape(email)}",
-        f"Submission ID: {submission_id}",
-        f"Submitted: {datetime.now(timezone.utc).strftime('%B %d, %Y at %I:%M %p UTC')}"
-    ]
-    for line in info:
-        c.drawString(80, y, line)
-        y -= 28
-
-    c.setFont("Helvetica", 12)
-    c.setFillColor(colors.Color(0.05, 0.65, 0.9))
-    c.drawString(80, y - 20, "Next Step:")
-    c.setFont("Helvetica", 11)
-    c.setFillColor(colors.black)
-    c.drawString(80, y - 40, "Contact the Founder on Telegram for confirmation:")
-    c.setFillColor(colors.blue)
-    c.drawString(80, y - 60, "@EfajTahamidRIFAT")
-
-    c.setFillColor(colors.gray)
-    c.setFont("Helvetica", 9)
-    c.drawCentredString(w / 2, 50, "This receipt confirms submission only. No selection is guaranteed.")
-    c.setFillColor(colors.Color(0.05, 0.65, 0.9))
-    c.rect(0, 0, w, 8, fill=1)
-    c.save()
-    return pdf_path
+    return db.connection()
+
+class GroupCommitTimeout(Exception):
+    pass
+
+class GroupCommitWriter:
+    # One thread owns a write connection. Callers submit callables that write through db.execute
+    # and get a Future; everything queued is committed in one transaction (one fsync), each item
+    # under its own SAVEPOINT so a failing item (a duplicate, say) is rolled back alone and its
+    # exception is raised to its own caller. Items must not open transactions of their own.
+    # Nothing an item or the bookkeeping raises may end the thread: every later caller would hang.
+    def __init__(self, manager, max_batch, max_wait, timeout=GROUP_COMMIT_TIMEOUT):
+        self.manager = manager
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "batches": 0,
+            "items": 0,
+            "failed_items": 0,
+            "failed_batches": 0,
+            "max_batch": 0,
+            "commit_seconds_total": 0.0,
+            "commit_seconds_max": 0.0,
+            "queue_wait_seconds_total": 0.0,
+        }
+        self._batch_sizes = {}  # power-of-two floor of the batch size -> batches
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+                    self._thread.start()
+
+    def submit(self, work):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((work, future, time.perf_counter()))
+        return future
+
+    def run(self, work):
+        future = self.submit(work)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            pass
+        # Withdrawn while still queued, so nothing is written after the caller gave up; an item
+        # already in its transaction gets one more timeout to commit
+        if not future.cancel():
+            with suppress(TimeoutError):
+                return future.result(timeout=self.timeout)
+        raise GroupCommitTimeout(f"group commit did not finish within {self.timeout:g}s")
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._commit(batch)
+            except BaseException as e:
+                app.logger.exception("Group commit of %d items failed", len(batch))
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _commit(self, batch):
+        started = time.perf_counter()
+        outcomes = []
+        try:
+            with self.manager.transaction() as conn:
+                for work, future, _ in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    conn.execute("SAVEPOINT item")
+                    try:
+                        value = work()
+                    except BaseException as e:
+                        conn.execute("ROLLBACK TO item")
+                        conn.execute("RELEASE item")
+                        outcomes.append((future, None, e))
+                    else:
+                        conn.execute("RELEASE item")
+                        outcomes.append((future, value, None))
+        except BaseException as e:
+            # BEGIN or COMMIT failed, so none of the batch was written
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            with self._stats_lock:
+                self._stats["failed_batches"] += 1
+            metrics.inc("lunvex_group_commit_items_total", len(batch), outcome="batch_failed")
+            return
+        seconds = time.perf_counter() - started
+        # Callers resume only after the commit, so nobody acts on a row that might not persist
+        for future, value, error in outcomes:
+            if error is None:
+                future.set_result(value)
+            else:
+                future.set_exception(error)
+        failed = sum(1 for _, _, error in outcomes if error is not None)
+        with self._stats_lock:
+            stats = self._stats
+            stats["batches"] += 1
+            stats["items"] += len(outcomes)
+            stats["failed_items"] += failed
+            stats["max_batch"] = max(stats["max_batch"], len(batch))
+            stats["commit_seconds_total"] += seconds
+            stats["commit_seconds_max"] = max(stats["commit_seconds_max"], seconds)
+            stats["queue_wait_seconds_total"] += sum(started - queued for _, _, queued in batch)
+            bucket = 1 << (len(batch).bit_length() - 1)
+            self._batch_sizes[bucket] = self._batch_sizes.get(bucket, 0) + 1
+        metrics.observe("group_commit", seconds)
+        metrics.inc("lunvex_group_commits_total")
+        metrics.inc("lunvex_group_commit_items_total", len(outcomes) - failed, outcome="committed")
+        metrics.inc("lunvex_group_commit_items_total", failed, outcome="rolled_back")
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+            sizes = dict(sorted(self._batch_sizes.items()))
+        batches = stats["batches"] or 1
+        stats["avg_batch"] = round(stats["items"] / batches, 2)
+        stats["avg_commit_ms"] = round(stats["commit_seconds_total"] / batches * 1000, 3)
+        stats["avg_queue_wait_ms"] = round(stats["queue_wait_seconds_total"] / (stats["items"] or 1) * 1000, 3)
+        stats["commit_seconds_max"] = round(stats["commit_seconds_max"], 6)
+        for key in ("commit_seconds_total", "queue_wait_seconds_total"):
+            stats[key] = round(stats[key], 6)
+        stats["batch_sizes"] = {f"{size}-{size * 2 - 1}" if size > 1 else "1": n for size, n in sizes.items()}
+        return stats
+
+db_writer = GroupCommitWriter(db, GROUP_COMMIT_MAX_BATCH, GROUP_COMMIT_MAX_WAIT_MS / 1000)
+
+def search_index_state():
+    done_through, high = db.execute("search_backfill_state").fetchone()
+    return {"indexed_through": done_through, "backfill_high": high, "complete": done_through >= high}
+
+def backfill_search_index(chunk=SEARCH_BACKFILL_CHUNK, pause=SEARCH_BACKFILL_PAUSE):
+    # Short transactions by id range; progress is committed with each chunk, so any number of
+    # processes can run this at once and a restart resumes where the last one stopped
+    indexed = 0
+    while True:
+        with db.transaction():
+            done_through, high = db.execute("search_backfill_state").fetchone()
+            if done_through >= high:
+                return indexed
+            upto = min(high, done_through + chunk)
+            indexed += db.execute("search_backfill_chunk", (done_through, upto)).rowcount
+            db.execute("search_backfill_advance", (upto,))
+        time.sleep(pause)
+
+_search_backfill_started = False
+_search_backfill_lock = threading.Lock()
+
+def start_search_backfill():
+    global _search_backfill_started
+    with _search_backfill_lock:
+        if _search_backfill_started:
+            return
+        _search_backfill_started = True
+    if search_index_state()["complete"]:
+        return
+
+    def run():
+        try:
+            indexed = backfill_search_index()
+            app.logger.info("Search index backfill finished (%d applicants)", indexed)
+        except Exception:
+            app.logger.exception("Search index backfill failed; it resumes on the next start")
+
+    threading.Thread(target=run, name="search-backfill", daemon=True).start()
+
+class ApplicantKeys:
+    # In-memory (email, role) set so resubmissions are refused before any upload or image work.
+    # Only hits are answered from memory: a miss still costs a point lookup on the unique index
+    # (as the form is parsed), which also catches rows inserted by other processes.
+    # UNIQUE(email, role) at INSERT stays the authority either way.
+    def __init__(self):
+        self._keys = set()
+        self._lock = threading.Lock()
+        self.stats = {"warmed": 0, "memory_hits": 0, "index_hits": 0, "misses": 0}
+
+    def warm(self):
+        with closing(db.open_reader()) as conn:
+            keys = {(email, role) for email, role in conn.execute("SELECT email, role FROM applicants")}
+        with self._lock:
+            self._keys |= keys
+            self.stats["warmed"] = len(keys)
+
+    def add(self, email, role):
+        with self._lock:
+            self._keys.add((email, role))
+
+    def exists(self, email, role):
+        with self._lock:
+            if (email, role) in self._keys:
+                self.stats["memory_hits"] += 1
+                return True
+        found = db.execute("applicant_by_email_role", (email, role)).fetchone() is not None
+        with self._lock:
+            if found:
+                self._keys.add((email, role))
+            self.stats["index_hits" if found else "misses"] += 1
+        return found
+
+applicant_keys = ApplicantKeys()
+
+# ---------------- Blob Store ----------------
+class BlobGone(Exception):
+    pass
+
+def blob_key(digest, kind):
+    # Each stored generation of the same bytes gets its own key, so a gc-blobs run deleting an
+    # older generation can never take out an object a newer upload wrote
+    return f"{BLOB_PREFIX}{digest[:2]}/{digest}.{secrets.token_hex(4)}.{BLOB_EXTENSIONS[kind]}"
+
+def blob_digest(r2_key):
+    # sha256 of a content-addressed key, None for legacy per-submission keys
+    if not r2_key.startswith("blobs/"):
+        return None
+    return r2_key.rsplit("/", 1)[1].split(".", 1)[0]
+
+def store_blobs(uploads):
+    # uploads: [GuardedUpload, ...]; uploads what the index lacks and returns the key for each
+    found, missing = {}, {}
+    for upload in uploads:
+        row = db.execute("blob_by_hash", (upload.sha256,)).fetchone()
+        if row:
+            found[upload.sha256] = row["r2_key"]
+        else:
+            missing.setdefault(upload.sha256, (blob_key(upload.sha256, upload.kind), upload))  # photo and signature may be the same file
+    metrics.inc("lunvex_blob_uploads_total", len(uploads) - len(missing), result="deduplicated")
+    if not missing:
+        return [found[upload.sha256] for upload in uploads]
+    # No rollback: a concurrent request may already rely on the same blob; leftovers are
+    # registered with no references and reclaimed by gc-blobs
+    report = {"objects": []}
+    try:
+        report = upload_many([(upload, key) for key, upload in missing.values()], rollback=False)
+    except BatchUploadError as e:
+        report = e.report
+        raise
+    finally:
+        stored = {r["key"] for r in report["objects"] if r["ok"]}
+        now = _utc_now()
+        with db.transaction():
+            for digest, (key, upload) in missing.items():
+                if key in stored:
+                    db.execute("register_blob", (digest, key, upload.size, now))
+                    # A concurrent request may have registered the same bytes first; its key wins
+                    found[digest] = db.execute("blob_by_hash", (digest,)).fetchone()["r2_key"]
+        metrics.inc("lunvex_blob_uploads_total", len(stored), result="stored")
+        superseded = [key for digest, (key, _) in missing.items() if key in stored and found[digest] != key]
+        if superseded:
+            try:
+                storage.delete(superseded)
+            except Exception:
+                app.logger.warning("Could not delete superseded blob uploads %s", superseded, exc_info=True)
+    return [found[upload.sha256] for upload in uploads]
+
+def reference_blobs(keys):
+    # Runs inside the applicant's transaction. The index row must still point at the very key the
+    # applicant records: a blob collected (and perhaps stored again under a new key) after the
+    # lookup raises BlobGone, and the insert is retried with a fresh lookup and upload.
+    now = _utc_now()
+    for key in keys:
+        if db.execute("ref_blob", (now, blob_digest(key), key)).rowcount == 0:
+            raise BlobGone(key)
+
+class UploadClaimFailed(Exception):
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+
+def direct_key(upload_id, digest, kind):
+    # Unique per grant so nothing else ever writes it; still named by digest for blob_digest()
+    return f"{BLOB_PREFIX}direct/{upload_id}/{digest}.{BLOB_EXTENSIONS[kind]}"
+
+def grant_direct_uploads(files):
+    # files: {field: {"size", "type", "sha256"}} as declared by the browser. Every field gets a
+    # presigned PUT bound to the declared type, size and digest, even for bytes the index already
+    # holds: the grant must not reveal which images are stored, and only a verified upload proves
+    # the caller has the bytes. Dedup happens in claim_direct_uploads.
+    upload_id = secrets.token_urlsafe(24)
+    expires_at = time.time() + DIRECT_UPLOAD_TTL
+    grants, uploads = [], {}
+    for field, meta in files.items():
+        key = direct_key(upload_id, meta["sha256"], IMAGE_CONTENT_TYPES[meta["type"]])
+        grants.append((upload_id, field, key, meta["sha256"], meta["size"], meta["type"], expires_at))
+        url, headers = storage.presign_put(key, meta["type"], meta["size"], meta["sha256"], DIRECT_UPLOAD_TTL)
+        uploads[field] = {"url": url, "headers": headers}
+    with db.transaction():
+        for grant in grants:
+            db.execute("insert_upload_grant", grant)
+    return {"upload_id": upload_id, "expires_in": DIRECT_UPLOAD_TTL, "uploads": uploads}
+
+def claim_direct_uploads(upload_id, fields):
+    # Checks each uploaded object with a HEAD and a ranged GET of its signature bytes, then
+    # registers it like store_blobs would. The signed checksum makes a verified object proof of
+    # the declared digest, so only then may an existing blob stand in for it.
+    # Returns {field: (key, sha256)}; grants are consumed.
+    now = time.time()
+    grants = {r["field"]: r for r in db.execute("upload_grants", (upload_id, now)).fetchall()}
+    if set(grants) != set(fields):
+        raise UploadClaimFailed("upload_expired", "Your upload has expired. Please submit the form again.")
+    claimed, verified = {}, []
+    inspections = {field: (
+        _upload_pool.submit(storage.head, grant["r2_key"]),
+        _upload_pool.submit(storage.get_range, grant["r2_key"], 0, IMAGE_SIGNATURE_BYTES),
+    ) for field, grant in grants.items()}
+    for field, (head, magic) in inspections.items():
+        grant = grants[field]
+        try:
+            head, magic = head.result(), magic.result()
+        except ObjectMissing:
+            raise UploadClaimFailed("upload_missing", f"{field.capitalize()} upload did not complete. Please try again.")
+        if head["bytes"] != grant["bytes"] or head["content_type"] not in (None, grant["content_type"]):
+            raise UploadClaimFailed("upload_mismatch", f"{field.capitalize()} upload does not match the selected file.")
+        kind = next((kind for sig, kind in IMAGE_SIGNATURES.items() if magic.startswith(sig)), None)
+        if kind != IMAGE_CONTENT_TYPES[grant["content_type"]]:
+            raise UploadClaimFailed("not_an_image", "Only JPG/PNG allowed.")
+        claimed[field] = (grant["r2_key"], grant["sha256"])
+        verified.append(grant)
+    with db.transaction():
+        # Racing gc-blobs: whichever deletes the grant rows first owns the uploaded objects
+        if db.execute("claim_upload_grants", (upload_id, now)).rowcount != len(grants):
+            raise UploadClaimFailed("upload_expired", "Your upload has expired. Please submit the form again.")
+        for grant in verified:
+            db.execute("register_blob", (grant["sha256"], grant["r2_key"], grant["bytes"], _utc_now()))
+    # Bytes already indexed, or registered first by another claim, keep their existing key
+    for field, (key, digest) in claimed.items():
+        row = db.execute("blob_by_hash", (digest,)).fetchone()
+        if row and row["r2_key"] != key:
+            claimed[field] = (row["r2_key"], digest)
+    unused = {g["r2_key"] for g in grants.values()} - {key for key, _ in claimed.values()}
+    if unused:
+        try:
+            storage.delete(unused)
+        except Exception:
+            app.logger.warning("Could not delete superseded direct uploads %s", sorted(unused), exc_info=True)
+    metrics.inc("lunvex_blob_uploads_total", sum(g["r2_key"] in unused for g in verified), result="deduplicated")
+    metrics.inc("lunvex_blob_uploads_total", len({g["r2_key"] for g in verified} - unused), result="direct")
+    return claimed
+
+def expire_upload_grants(dry_run=False):
+    # Objects behind grants that were never claimed; returns how many grants were dropped
+    rows = db.execute("expired_upload_grants", (time.time(),)).fetchall()
+    if dry_run:
+        return len(rows)
+    by_upload = {}
+    for r in rows:
+        by_upload.setdefault(r["upload_id"], []).append(r["r2_key"])
+    dropped = 0
+    for upload_id, keys in by_upload.items():
+        with db.transaction():
+            count = db.execute("drop_upload_grants", (upload_id,)).rowcount
+        if count:
+            storage.delete(set(keys))
+            dropped += count
+    return dropped
+
+def publish_submission(submission_id, internal_pdf, receipt_pdf, photo_key, signature_key,
+                       photo=None, signature=None, data=None):
+    if SUBMISSION_BUNDLES:
+        return publish_bundle(submission_id, internal_pdf, receipt_pdf, photo_key, signature_key,
+                              photo, signature, data)
+    # PDFs are unique per submission and stay under its prefix; the manifest ties it to its blobs
+    user_prefix = f"submissions/{submission_id}/"
+    pdfs = {
+        "internal_record": (internal_pdf, f"{user_prefix}INTERNAL_RECORD.pdf"),
+        "receipt": (receipt_pdf, f"{user_prefix}RECEIPT.pdf"),
+    }
+    report = upload_many(list(pdfs.values()))
+    artifacts = {
+        "photo": {"key": photo_key, "sha256": blob_digest(photo_key)},
+        "signature": {"key": signature_key, "sha256": blob_digest(signature_key)},
+    }
+    for name, (path, key) in pdfs.items():
+        with open(path, "rb") as f:
+            artifacts[name] = {"key": key, "sha256": hashlib.file_digest(f, "sha256").hexdigest(),
+                               "bytes": os.path.getsize(path)}
+    manifest = {"submission_id": submission_id, "artifacts": artifacts, "updated_at": _utc_now()}
+    storage.put_bytes(f"{user_prefix}manifest.json", json.dumps(manifest).encode(), "application/json")
+    return report
+
+def collect_blobs(grace_seconds=BLOB_GC_GRACE_SECONDS, dry_run=False):
+    # Unreferenced blobs come from rejected or failed submissions; the grace period covers
+    # requests that have uploaded but not yet committed
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)).strftime("%Y-%m-%d %H:%M:%S")
+    grants_expired = expire_upload_grants(dry_run)
+    candidates = db.execute("unreferenced_blobs", (cutoff,)).fetchall()
+    deleted = []
+    if not dry_run:
+        for start in range(0, len(candidates), 1000):
+            batch = candidates[start:start + 1000]
+            # Index rows go first: once dropped, no new reference can be taken on that key. Bytes
+            # stored again meanwhile go to a new key (see blob_key), which this never touches.
+            with db.transaction():
+                gone = [r for r in batch if db.execute("drop_blob", (r["sha256"], r["r2_key"])).rowcount]
+            storage.delete([r["r2_key"] for r in gone])
+            deleted += gone
+    return {
+        "candidates": len(candidates),
+        "deleted": len(deleted),
+        "bytes_freed": sum(r["bytes"] for r in deleted),
+        "grants_expired": grants_expired,
+    }
+
+# ---------------- Submission Bundles ----------------
+def bundle_key(submission_id):
+    return f"submissions/{submission_id}/{BUNDLE_NAME}"
+
+def build_bundle(path, members):
+    # members: [(name, bytes or local path), ...]. Stored rather than deflated: the PDFs and
+    # images are compressed already, and a stored member is served by a plain byte range.
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zf:
+        for name, source in members:
+            if isinstance(source, str):
+                zf.write(source, name)
+            else:
+                zf.writestr(name, source)
+    index = {}
+    with open(path, "rb") as f, zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            # Data starts after the local header, whose extra field may differ from the central one
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = struct.unpack("<HH", f.read(4))
+            index[info.filename] = [info.header_offset + 30 + name_len + extra_len, info.file_size]
+    encoded = json.dumps(index, separators=(",", ":"))
+    with zipfile.ZipFile(path, "a") as zf:
+        zf.comment = encoded.encode()
+    return encoded
+
+def publish_bundle(submission_id, internal_pdf, receipt_pdf, photo_key, signature_key, photo, signature, data):
+    # One PUT per submission instead of one per artifact plus the manifest
+    if photo is None or signature is None:
+        photo, signature = storage.get_bytes(photo_key), storage.get_bytes(signature_key)
+    images = {
+        f"photo.{photo_key.rsplit('.', 1)[1]}": (photo, photo_key),
+        f"signature.{signature_key.rsplit('.', 1)[1]}": (signature, signature_key),
+    }
+    artifacts = {}
+    for name, path in (("INTERNAL_RECORD.pdf", internal_pdf), ("RECEIPT.pdf", receipt_pdf)):
+        with open(path, "rb") as f:
+            artifacts[name] = {"sha256": hashlib.file_digest(f, "sha256").hexdigest(), "bytes": os.path.getsize(path)}
+    for name, (content, key) in images.items():
+        artifacts[name] = {"sha256": hashlib.sha256(content).hexdigest(), "bytes": len(content), "key": key}
+    record = {"submission_id": submission_id, "applicant": data, "artifacts": artifacts, "updated_at": _utc_now()}
+    members = [("INTERNAL_RECORD.pdf", internal_pdf), ("RECEIPT.pdf", receipt_pdf)]
+    members += [(name, content) for name, (content, _) in images.items()]
+    members.append(("metadata.json", json.dumps(record).encode()))
+
+    path = os.path.join(PDF_FOLDER, f"{submission_id}.bundle.zip")
+    try:
+        index = build_bundle(path, members)
+        return upload_many([(path, bundle_key(submission_id), {
+            "content_type": "application/zip",
+            "metadata": {BUNDLE_INDEX_METADATA: index},
+        })])
+    finally:
+        with suppress(FileNotFoundError):
+            os.remove(path)
+
+class BundleReader:
+    # Pulls single members out of a stored bundle with range reads. The index comes from the
+    # object's metadata with the HEAD, or from the archive comment in the last few KB.
+    def __init__(self, key, store=None):
+        self.key = key
+        self.store = store or storage
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            head = self.store.head(self.key)
+            encoded = head.get("metadata", {}).get(BUNDLE_INDEX_METADATA)
+            if encoded is None:
+                encoded = self._index_from_comment(head["bytes"])
+            self._index = json.loads(encoded)
+        return self._index
+
+    def _index_from_comment(self, size):
+        length = min(size, BUNDLE_TAIL_BYTES)
+        tail = self.store.get_range(self.key, size - length, length)
+        pos = tail.rfind(b"PK\x05\x06")
+        if pos < 0:
+            raise ValueError(f"{self.key} has no bundle index")
+        (comment_len,) = struct.unpack_from("<H", tail, pos + 20)
+        return tail[pos + 22:pos + 22 + comment_len]
+
+    def names(self):
+        return list(self.index)
+
+    def read(self, name):
+        if name not in self.index:
+            raise ObjectMissing(f"{self.key}#{name}")
+        offset, size = self.index[name]
+        return self.store.get_range(self.key, offset, size) if size else b""
+
+def read_submission_artifact(submission_id, name):
+    # Works for bundled and loose submissions alike; the configured mode is tried first
+    loose = lambda: storage.get_bytes(f"submissions/{submission_id}/{name}")
+    bundled = lambda: BundleReader(bundle_key(submission_id)).read(name)
+    first, second = (bundled, loose) if SUBMISSION_BUNDLES else (loose, bundled)
+    try:
+        return first()
+    except ObjectMissing:
+        return second()
+
+# ---------------- Receipt Downloads ----------------
+SUBMISSION_ID_PATTERN = re.compile(r"LX\d{1,12}_[0-9a-f]{8}(?:[0-9a-f]{8})?")  # older ids lack the random half
+
+class DiskLRU:
+    # Size-bounded cache of immutable files named <key>.<etag><suffix>, so the ETag survives
+    # restarts. Hits never touch the file, whose mtime is the Last-Modified send_file serves;
+    # recency is kept in memory instead. The folder is shared by every worker: before writing,
+    # a process folds in the files others added, ranked by mtime against its own last use, and
+    # drops those they evicted, so max_bytes bounds the folder rather than each process.
+    def __init__(self, folder, max_bytes, suffix):
+        self.folder = os.path.abspath(folder)  # send_file resolves relative paths against the app root
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._entries = None  # key -> (filename, bytes, last used), least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _key(self, name):
+        return name[:-len(self.suffix)].rsplit(".", 1)[0]
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        self._sync()
+        self._evict()
+
+    def _sync(self):
+        found = {}
+        os.makedirs(self.folder, exist_ok=True)
+        for name in os.listdir(self.folder):
+            if not name.endswith(self.suffix):
+                continue  # includes partial .tmp writes
+            with suppress(FileNotFoundError):
+                st = os.stat(os.path.join(self.folder, name))
+                found[name] = (st.st_size, st.st_mtime)
+        for key, (name, size, _) in list(self._entries.items()):
+            if name not in found:
+                del self._entries[key]  # evicted by another worker
+                self._bytes -= size
+        known = {entry[0] for entry in self._entries.values()}
+        for name, (size, mtime) in found.items():
+            key = self._key(name)
+            if name not in known and key not in self._entries:
+                self._entries[key] = (name, size, mtime)
+                self._bytes += size
+        self._entries = OrderedDict(sorted(self._entries.items(), key=lambda item: item[1][2]))
+
+    def _remove(self, name):
+        with suppress(FileNotFoundError):
+            os.remove(os.path.join(self.folder, name))
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (stale, stale_size, _) = self._entries.popitem(last=False)
+            self._bytes -= stale_size
+            self._remove(stale)
+            self.stats["evictions"] += 1
+
+    def _add(self, key, name, size):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+            if old[0] != name:
+                self._remove(old[0])
+        self._entries[key] = (name, size, time.time())
+        self._bytes += size
+        self._evict()
+
+    def get(self, key):
+        # (path, etag) of a cached file, or None
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is not None:
+                path = os.path.join(self.folder, entry[0])
+                if not os.path.exists(path):
+                    del self._entries[key]  # evicted by another worker
+                    self._bytes -= entry[1]
+                    entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries[key] = (entry[0], entry[1], time.time())
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return path, entry[0][len(key) + 1:-len(self.suffix)]
+
+    def put(self, key, data):
+        etag = hashlib.sha256(data).hexdigest()[:32]
+        name = f"{key}.{etag}{self.suffix}"
+        path = os.path.join(self.folder, name)
+        os.makedirs(self.folder, exist_ok=True)
+        tmp = f"{path}.{secrets.token_hex(4)}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._load()
+            self._sync()
+            self._add(key, name, len(data))
+        return path, etag
+
+    def discard(self, key):
+        with self._lock:
+            self._load()
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+                self._remove(entry[0])
+
+    def snapshot(self):
+        with self._lock:
+            return {"entries": len(self._entries or ()), "bytes": self._bytes,
+                    "max_bytes": self.max_bytes, **self.stats}
+
+class ReceiptStore:
+    # Finds a submission's receipt PDF: disk cache first, then storage. Misses are remembered
+    # for a while, and concurrent misses for one id share a single storage GET.
+    def __init__(self, cache):
+        self.cache = cache
+        self.negative = LRUCache(RECEIPT_NEGATIVE_ENTRIES)  # id -> (expires_at, retry_after)
+        self._fetching = {}
+        self._lock = threading.Lock()
+        self.stats = {"fetches": 0, "negative_hits": 0, "unknown": 0, "pending": 0}
+
+    def open(self, submission_id):
+        # (path, etag), or None; remembered() then tells unknown ids from pending receipts
+        hit = self.cache.get(submission_id)
+        if hit is not None:
+            return hit
+        if self.remembered(submission_id):
+            self.stats["negative_hits"] += 1
+            return None
+        with self._lock:
+            event = self._fetching.get(submission_id)
+            leader = event is None
+            if leader:
+                event = self._fetching[submission_id] = threading.Event()
+        if not leader:
+            event.wait(RECEIPT_FETCH_TIMEOUT)
+            return self.cache.get(submission_id)
+        try:
+            return self._fetch(submission_id)
+        finally:
+            with self._lock:
+                del self._fetching[submission_id]
+            event.set()
+
+    def remembered(self, submission_id):
+        # (expires_at, retry_after) while a miss is remembered; retry_after is None for unknown ids
+        entry = self.negative.get(submission_id)
+        return entry if entry is not None and entry[0] >= time.time() else None
+
+    def _fetch(self, submission_id):
+        # Unknown ids are settled by the database and never reach storage
+        if db.execute("applicant_by_submission", (submission_id,)).fetchone() is None:
+            self.stats["unknown"] += 1
+            self.negative.put(submission_id, (time.time() + RECEIPT_NEGATIVE_TTL, None))
+            return None
+        try:
+            self.stats["fetches"] += 1
+            data = read_submission_artifact(submission_id, "RECEIPT.pdf")
+        except ObjectMissing:
+            self.stats["pending"] += 1
+            self.negative.put(submission_id, (time.time() + RECEIPT_PENDING_RETRY, RECEIPT_PENDING_RETRY))
+            return None
+        return self.cache.put(submission_id, data)
+
+    def invalidate(self, submission_id):
+        self.negative.discard(submission_id)
+        self.cache.discard(submission_id)
+
+    def snapshot(self):
+        return {"cache": self.cache.snapshot(), "negative_entries": len(self.negative), **self.stats}
+
+receipts = ReceiptStore(DiskLRU(RECEIPT_CACHE_FOLDER, RECEIPT_CACHE_MAX_BYTES, ".pdf"))
+
+# ---------------- Request Protection ----------------
+def load_secret_key():
+    if SECRET_KEY:
+        return SECRET_KEY.encode()
+    try:
+        with open(SECRET_KEY_FILE, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    # Written aside and linked into place, so concurrent workers agree on whichever lands first
+    tmp = f"{SECRET_KEY_FILE}.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(secrets.token_bytes(32))
+    os.chmod(tmp, 0o600)
+    try:
+        os.link(tmp, SECRET_KEY_FILE)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp)
+    with open(SECRET_KEY_FILE, "rb") as f:
+        return f.read()
+
+_secret_key = None
+
+def _signature(purpose, payload):
+    # The purpose prefix keeps a token minted for one use from verifying as another
+    global _secret_key
+    if _secret_key is None:
+        _secret_key = load_secret_key()
+    digest = hmac.new(_secret_key, f"{purpose}:{payload}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:18]).decode()
+
+def _csrf_signature(payload):
+    return _signature("csrf", payload)
+
+def receipt_token(submission_id):
+    # Only the success page hands this out, so knowing an applicant's email is not enough
+    return _signature("receipt", submission_id)
+
+def verify_receipt_token(submission_id, token):
+    return bool(token) and hmac.compare_digest(token.encode(), receipt_token(submission_id).encode())
+
+def issue_csrf_token():
+    # <issued-at>.<nonce>.<hmac>: verifiable by any worker without server-side storage
+    payload = f"{int(time.time())}.{secrets.token_urlsafe(9)}"
+    return f"{payload}.{_csrf_signature(payload)}"
+
+def verify_csrf_token(token):
+    if not token or token.count(".") != 2:
+        return False
+    payload, signature = token.rsplit(".", 1)
+    if not hmac.compare_digest(signature.encode(), _csrf_signature(payload).encode()):
+        return False
+    issued_at = payload.split(".", 1)[0]
+    return issued_at.isdigit() and 0 <= time.time() - int(issued_at) <= CSRF_TOKEN_TTL
+
+class RateLimiter:
+    # Token bucket per client in its own SQLite file, so every worker process shares the counts
+    # without contending with the applicant database's write lock
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path, per_minute, burst):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.db = ConnectionManager(path)
+        self._calls = 0
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def init(self):
+        conn = self.db.connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                client TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        conn.commit()
+
+    def allow(self, client):
+        now = time.time()
+        params = {"client": client, "burst": self.burst, "rate": self.rate, "now": now}
+        try:
+            with self.db.transaction():
+                allowed = self.db.execute("take_token", params).fetchone() is not None
+                self._calls += 1
+                if self._calls % self.PRUNE_EVERY == 0:
+                    # A bucket idle long enough to refill completely carries no state
+                    self.db.execute("prune_buckets", (now - self.burst / self.rate,))
+        except sqlite3.OperationalError:
+            app.logger.warning("Rate limiter unavailable; letting %s through", client)
+            return True
+        return allowed
+
+    def retry_after(self):
+        return max(1, int(1 / self.rate + 0.999))
+
+rate_limiter = RateLimiter(RATE_LIMIT_DATABASE, RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST)
+ADMITTED_ENVIRON_KEY = "lunvex.admitted"
+
+def admit_submission(client):
+    return not rate_limiter.enabled or rate_limiter.allow(client or "unknown")
+
+def admit_upload_grant(client):
+    # A bucket of its own: a direct-upload submission spends one token here for its presigned
+    # URLs and one from the submission bucket for the POST /apply that follows, not two from one
+    return not rate_limiter.enabled or rate_limiter.allow(f"uploads:{client or 'unknown'}")
+
+def rate_limited_response():
+    body, status = reject("rate_limited", "Too many submissions from your network. Please wait a minute and try again.", 429)
+    return body, status, {"Retry-After": str(rate_limiter.retry_after())}
+
+# ---------------- Replication ----------------
+DELTA_MAGIC = b"LXDELTA1"
+DELTA_HEADER = struct.Struct(">IIQ")  # page_size, page_count, changed pages
+DELTA_PAGE = struct.Struct(">I")
+
+def backup_prefix(instance_id=INSTANCE_ID):
+    return f"backups/{instance_id}/"
+
+def snapshot_db(dest_path):
+    # Online backup API: a consistent copy even while other workers are writing
+    src = sqlite3.connect(DATABASE)
+    dst = sqlite3.connect(dest_path)
+    try:
+        src.backup(dst)
+        page_size = dst.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        dst.close()
+        src.close()
+    return page_size
+
+def page_hashes(path, page_size):
+    hashes = []
+    with open(path, "rb") as f:
+        while True:
+            page = f.read(page_size)
+            if not page:
+                break
+            hashes.append(hashlib.blake2b(page, digest_size=16).digest())
+    return hashes
+
+def encode_delta(path, page_size, page_numbers, page_count):
+    out = [DELTA_MAGIC, DELTA_HEADER.pack(page_size, page_count, len(page_numbers))]
+    with open(path, "rb") as f:
+        for n in page_numbers:
+            f.seek(n * page_size)
+            out.append(DELTA_PAGE.pack(n))
+            out.append(f.read(page_size))
+    return zlib.compress(b"".join(out), 6)
+
+def apply_delta(f, blob):
+    raw = zlib.decompress(blob)
+    if not raw.startswith(DELTA_MAGIC):
+        raise ValueError("Not a replication delta")
+    pos = len(DELTA_MAGIC)
+    page_size, page_count, changed = DELTA_HEADER.unpack_from(raw, pos)
+    pos += DELTA_HEADER.size
+    for _ in range(changed):
+        (n,) = DELTA_PAGE.unpack_from(raw, pos)
+        pos += DELTA_PAGE.size
+        f.seek(n * page_size)
+        f.write(raw[pos:pos + page_size])
+        pos += page_size
+    f.truncate(page_count * page_size)
+
+class DBReplicator:
+    # One replicator per database file. Workers race for an flock on a lock file beside the DB;
+    # the winner resumes the sequence from the shipped manifest and replicates for every process,
+    # noticing other connections' commits through PRAGMA data_version. Losers retry the lock on
+    # later backup requests, so a new leader takes over when the old one's process exits.
+    def __init__(self, instance_id, database):
+        self.prefix = backup_prefix(instance_id)
+        self.instance_id = instance_id
+        self.database = database
+        self.lock_path = f"{database}.replicator.lock"
+        self.seq = 0
+        self.page_size = None
+        self.hashes = None
+        self.base_key = None
+        self.deltas = []
+        self.last_full_at = 0.0
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._elect_lock = threading.Lock()
+        self._lock_fd = None
+        self._elect_after = 0.0
+        self._watch = None
+        self._data_version = None
+
+    def _reset_after_fork(self):
+        # The lock belongs to the parent's open file; closing our copy leaves it held there
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+        self._reset()
+
+    def is_leader(self):
+        if self._lock_fd is None and time.monotonic() >= self._elect_after:
+            with self._elect_lock:
+                if self._lock_fd is None:
+                    self._elect()
+        return self._lock_fd is not None
+
+    def _elect(self):
+        self._elect_after = time.monotonic() + BACKUP_DEBOUNCE_SECONDS
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return
+        try:
+            self._load_manifest()
+        except Exception:
+            # Shipping without the previous state would reuse its keys; stand down and retry later
+            os.close(fd)
+            app.logger.exception("Could not load the replication manifest; not replicating yet")
+            return
+        self._lock_fd = fd
+        self._watch = sqlite3.connect(self.database, check_same_thread=False)
+        threading.Thread(target=self._run, name="db-replicator", daemon=True).start()
+
+    def _load_manifest(self):
+        try:
+            manifest = json.loads(storage.durable().get_bytes(f"{self.prefix}manifest.json"))
+        except ObjectMissing:
+            return
+        # hashes stay None, so the first run after a restart ships a full base under the next seq
+        self.seq = manifest["seq"]
+        self.base_key = manifest["base"]
+        self.deltas = list(manifest["deltas"])
+
+    def request_backup(self):
+        # The leader's poll notices the commit; this only makes sure some process is leading
+        self.is_leader()
+
+    def _run(self):
+        # Debounced: whatever was committed during an interval goes out as one snapshot
+        while True:
+            time.sleep(BACKUP_DEBOUNCE_SECONDS)
+            try:
+                self.flush()
+            except Exception:
+                app.logger.exception("DB replication failed")
+
+    def flush(self):
+        if self._lock_fd is None:
+            return
+        with self._lock:
+            version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return
+            self._data_version = version
+        try:
+            self.replicate()
+        except Exception:
+            self._data_version = None  # retried on the next poll even without new commits
+            raise
+
+    def replicate(self):
+        with self._lock, metrics.time("backup"):
+            snap = os.path.join(BACKUP_FOLDER, f"snapshot-{self.instance_id}.db")
+            page_size = snapshot_db(snap)
+            hashes = page_hashes(snap, page_size)
+            self.seq += 1
+            full_due = (
+                self.hashes is None
+                or page_size != self.page_size
+                or len(self.deltas) >= BACKUP_FULL_EVERY
+                or time.time() - self.last_full_at >= BACKUP_FULL_INTERVAL
+            )
+            try:
+                if full_due:
+                    self._ship_full(snap)
+                else:
+                    changed = [i for i, h in enumerate(hashes) if i >= len(self.hashes) or self.hashes[i] != h]
+                    if not changed and len(hashes) == len(self.hashes):
+                        return
+                    self._ship_delta(snap, page_size, changed, len(hashes))
+            finally:
+                os.remove(snap)
+            self.page_size = page_size
+            self.hashes = hashes
+
+    def _ship_full(self, snap):
+        key = f"{self.prefix}base-{self.seq:010d}.db"
+        # Backups skip the write-behind tier: the manifest must never point at unshipped objects
+        storage.durable().put_file(snap, key)
+        stale = ([self.base_key] if self.base_key else []) + self.deltas
+        self.base_key, self.deltas, self.last_full_at = key, [], time.time()
+        self._write_manifest()
+        storage.durable().delete(stale)
+
+    def _ship_delta(self, snap, page_size, changed, page_count):
+        key = f"{self.prefix}delta-{self.seq:010d}.bin"
+        storage.durable().put_bytes(key, encode_delta(snap, page_size, changed, page_count))
+        self.deltas.append(key)
+        self._write_manifest()
+
+    def _write_manifest(self):
+        manifest = {
+            "instance_id": self.instance_id,
+            "base": self.base_key,
+            "deltas": self.deltas,
+            "seq": self.seq,
+            "updated_at": _utc_now(),
+        }
+        storage.durable().put_bytes(f"{self.prefix}manifest.json", json.dumps(manifest).encode(), "application/json")
+
+def restore_db(instance_id, output_path):
+    prefix = backup_prefix(instance_id)
+    source = storage.durable()
+    manifest = json.loads(source.get_bytes(f"{prefix}manifest.json"))
+    tmp_path = f"{output_path}.restore"
+    source.download(manifest["base"], tmp_path)
+    with open(tmp_path, "r+b") as f:
+        for key in manifest["deltas"]:
+            apply_delta(f, source.get_bytes(key))
+    check = sqlite3.connect(tmp_path)
+    try:
+        if check.execute("PRAGMA integrity_check").fetchone()[0] != "ok":
+            raise RuntimeError("Restored database failed integrity check")
+    finally:
+        check.close()
+    os.replace(tmp_path, output_path)
+    return manifest
+
+db_replicator = DBReplicator(INSTANCE_ID, DATABASE)
+atexit.register(db_replicator.flush)
+
+# ---------------- Job Queue ----------------
+_job_wakeup = threading.Event()
+_job_workers = []
+_job_workers_lock = threading.Lock()
+_external_job_wakeup = None  # set when an event loop drives the queue instead of worker threads
+
+def _utc_now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+def enqueue_job(submission_id, kind, payload):
+    # Call inside db.transaction(): the job commits (or rolls back) with the caller's rows
+    now = _utc_now()
+    db.execute("enqueue_job", (submission_id, kind, json.dumps(payload), time.time(), now, now))
+
+def claim_job():
+    # Peek without the write lock so idle workers do not contend with submissions
+    now = time.time()
+    if db.execute("next_job", (now, now)).fetchone() is None:
+        return None
+    with db.transaction():
+        row = db.execute("next_job", (now, now)).fetchone()
+        if row is None:
+            return None
+        db.execute("lease_job", (now + JOB_LEASE_SECONDS, _utc_now(), row["id"]))
+    job = dict(row)
+    job["attempts"] += 1
+    return job
+
+def set_job_stage(job_id, stage):
+    with db.transaction():
+        db.execute("set_job_stage", (stage, _utc_now(), job_id))
+
+def complete_job(job_id):
+    with db.transaction():
+        db.execute("complete_job", (_utc_now(), job_id))
+
+def fail_job(job, error):
+    # Exponential backoff with full jitter; give up after JOB_MAX_ATTEMPTS
+    if job["attempts"] >= JOB_MAX_ATTEMPTS:
+        status, run_after = "failed", job["run_after"]
+    else:
+        delay = min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE ** job["attempts"])
+        status, run_after = "queued", time.time() + random.uniform(delay / 2, delay)
+    with db.transaction():
+        db.execute("fail_job", (status, run_after, str(error)[:500], _utc_now(), job["id"]))
+    return status
+
+def process_submission_job(job):
+    payload = json.loads(job["payload"])
+    data = payload["data"]
+    submission_id = job["submission_id"]
+
+    set_job_stage(job["id"], "rendering")
+    photo = storage.get_bytes(payload["photo_key"])
+    signature = storage.get_bytes(payload["signature_key"])
+    internal_pdf = receipt_pdf = None
+    try:
+        with metrics.time("pdf_internal"):
+            internal_pdf = pdf_render.generate_internal_pdf(data, photo, signature, submission_id)
+        with metrics.time("pdf_receipt"):
+            receipt_pdf = pdf_render.generate_receipt_pdf(data["name"], data["role"], data["email"], submission_id)
+
+        # Upload under the per-submission prefix (a single bundle in bundle mode)
+        set_job_stage(job["id"], "uploading")
+        report = publish_submission(submission_id, internal_pdf, receipt_pdf, payload["photo_key"], payload["signature_key"],
+                                    photo, signature, data)
+        app.logger.info("Uploaded %s in %.3fs: %s", submission_id, report["seconds"],
+                        ", ".join(f"{r['key'].rsplit('/', 1)[1]}={r['seconds']}s" for r in report["objects"]))
+
+        set_job_stage(job["id"], "backup")
+        backup_db()
+    finally:
+        # A failed attempt is retried from the stored images, so its PDFs are never needed again
+        for f in (internal_pdf, receipt_pdf):
+            if f and os.path.exists(f):
+                os.remove(f)
+
+JOB_HANDLERS = {
+    "process_submission": process_submission_job,
+}
+
+def renderer_pool(workers):
+    # Spawned rather than forked: a fork taken while the warm-up, metrics or storage threads hold a
+    # lock (the import lock included) leaves the child deadlocked on it. Submit pdf_render functions
+    # only; unpickling anything from this module would boot the whole portal in the child.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def run_job(job):
+    try:
+        JOB_HANDLERS[job["kind"]](job)
+    except Exception as e:
+        status = fail_job(job, e)
+        app.logger.exception("Job %s (%s) for %s failed, now %s", job["id"], job["kind"], job["submission_id"], status)
+    else:
+        complete_job(job["id"])
+
+def _job_worker_loop():
+    while True:
+        try:
+            job = claim_job()
+        except sqlite3.Error:
+            app.logger.exception("Job claim failed")
+            job = None
+        if job is None:
+            _job_wakeup.wait(JOB_POLL_SECONDS)
+            _job_wakeup.clear()
+            continue
+        run_job(job)
+
+def start_job_workers():
+    with _job_workers_lock:
+        if _job_workers or _external_job_wakeup is not None:
+            return
+        for i in range(JOB_WORKERS):
+            t = threading.Thread(target=_job_worker_loop, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            _job_workers.append(t)
+
+def notify_job_workers():
+    if _external_job_wakeup is not None:
+        _external_job_wakeup()
+        return
+    start_job_workers()
+    _job_wakeup.set()
+
+def use_external_job_runner(wakeup):
+    # wakeup() must be safe to call from any thread; worker threads are never started afterwards
+    global _external_job_wakeup
+    with _job_workers_lock:
+        if _job_workers:
+            raise RuntimeError("job worker threads are already running")
+        _external_job_wakeup = wakeup
 
 # ---------------- Templates ----------------
 # (HOME_TEMPLATE, APPLY_TEMPLATE, FAQ_TEMPLATE, INVESTORS_TEMPLATE remain exactly as in previous full code)
@@ -415,6 +2854,7 @@ APPLY_TEMPLATE = """
         .nav a { color: #94a3b8; text-decoration: none; margin: 0 15px; }
         .nav a:hover { color: #0ea5e9; }
     </style>
+    <link rel="preload" href="{{ url_for('portal.taxonomy_json', version=taxonomy_version) }}" as="fetch" crossorigin="anonymous">
 </head>
 <body>
     <div class="nav">
@@ -432,8 +2872,9 @@ APPLY_TEMPLATE = """
             <strong>Internship</strong>: 5-month unpaid program. Certificate issued. Top performers may join Core Team.
         </div>
 
-        <form method="post" enctype="multipart/form-data">
+        <form method="post" enctype="multipart/form-data" id="apply-form">
             <input type="hidden" name="csrf_token" value="{{ csrf_token }}">
+            <input type="hidden" name="upload_id" value="">
             
             <label for="role">I want to...</label>
             <select name="role" id="role" required>
@@ -451,7 +2892,7 @@ APPLY_TEMPLATE = """
             <label for="niche">Niche</label>
             <select name="niche" id="niche" required>
                 <option value="">Select Niche</option>
-                {% for niche in niches.keys() %}
+                {% for niche in niches %}
                 <option value="{{ niche }}">{{ niche }}</option>
                 {% endfor %}
             </select>
@@ -504,7 +2945,11 @@ APPLY_TEMPLATE = """
     </div>
 
     <script>
-        const NICHES_DATA = {{ niches | tojson }};
+        // The taxonomy is fetched from a content-hashed URL, so it is downloaded once per version
+        let NICHES_DATA = {};
+        const taxonomyLoaded = fetch("{{ url_for('portal.taxonomy_json', version=taxonomy_version) }}")
+            .then(r => r.json())
+            .then(data => { NICHES_DATA = data; });
         const roleSelect = document.getElementById('role');
         const nicheSelect = document.getElementById('niche');
         const sectorSelect = document.getElementById('sector');
@@ -542,8 +2987,53 @@ APPLY_TEMPLATE = """
         roleSelect.addEventListener('change', () => {
             unpaidAck.style.display = roleSelect.value === 'Internship' ? 'flex' : 'none';
         });
-        nicheSelect.addEventListener('change', updateSectors);
-        sectorSelect.addEventListener('change', updateSubsectors);
+        nicheSelect.addEventListener('change', () => taxonomyLoaded.then(updateSectors));
+        sectorSelect.addEventListener('change', () => taxonomyLoaded.then(updateSubsectors));
+
+        const DIRECT_UPLOADS = {{ 'true' if direct_uploads else 'false' }};
+        const applyForm = document.getElementById('apply-form');
+
+        async function sha256Hex(file) {
+            const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+            return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+        }
+
+        // Images are PUT straight to storage and the form then posts only its text fields.
+        // Any failure falls back to the ordinary multipart post.
+        async function uploadDirect() {
+            const inputs = {photo: applyForm.elements.photo, signature: applyForm.elements.signature};
+            const files = {};
+            for (const [field, input] of Object.entries(inputs)) {
+                const file = input.files[0];
+                files[field] = {type: file.type, size: file.size, sha256: await sha256Hex(file)};
+            }
+            const resp = await fetch('/apply/uploads', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({csrf_token: applyForm.elements.csrf_token.value, files}),
+            });
+            if (!resp.ok) throw new Error('upload grant refused');
+            const grant = await resp.json();
+            await Promise.all(Object.entries(grant.uploads).map(async ([field, upload]) => {
+                const put = await fetch(upload.url, {method: 'PUT', headers: upload.headers, body: inputs[field].files[0]});
+                if (!put.ok) throw new Error(`${field} upload failed`);
+            }));
+            applyForm.elements.upload_id.value = grant.upload_id;
+            Object.values(inputs).forEach(input => { input.disabled = true; });
+            applyForm.enctype = 'application/x-www-form-urlencoded';
+        }
+
+        applyForm.addEventListener('submit', async (event) => {
+            if (!DIRECT_UPLOADS || !window.crypto?.subtle || applyForm.dataset.sending) return;
+            event.preventDefault();
+            applyForm.dataset.sending = '1';
+            try {
+                await uploadDirect();
+            } catch (err) {
+                applyForm.elements.upload_id.value = '';
+            }
+            applyForm.submit();
+        });
     </script>
 </body>
 </html>
@@ -735,85 +3225,192 @@ INVESTORS_TEMPLATE = """
 </html>
 """
 
+# ---------------- Template Registry ----------------
+class StaticPage:
+    # One rendered page held as bytes, with a pre-compressed variant per content-coding
+    def __init__(self, html_text):
+        self.body = html_text.encode("utf-8")
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.variants = {"gzip": gzip.compress(self.body, 9)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(self.body, quality=11)
+
+    def etag_for(self, encoding):
+        return f"{self.etag}-{encoding}" if encoding else self.etag
+
+TEMPLATES = {}
+STATIC_PAGES = {}
+
+def build_template_registry(app):
+    # Compile every template once; pages without per-request data are rendered once too
+    for name, source in [
+        ("home", HOME_TEMPLATE),
+        ("apply", APPLY_TEMPLATE),
+        ("faqs", FAQ_TEMPLATE),
+        ("investors", INVESTORS_TEMPLATE),
+    ]:
+        TEMPLATES[name] = app.jinja_env.from_string(source)
+    for name in ("home", "faqs", "investors"):
+        STATIC_PAGES[name] = StaticPage(TEMPLATES[name].render())
+
+def serve_static_page(name, if_none_match=None, accept_encodings=None):
+    # The ASGI entry point passes parsed headers; Flask views use the current request's
+    return serve_page(STATIC_PAGES[name], "text/html", f"public, max-age={STATIC_PAGE_MAX_AGE}",
+                      if_none_match, accept_encodings)
+
+def serve_page(page, mimetype, cache_control, if_none_match=None, accept_encodings=None):
+    if if_none_match is None:
+        if_none_match = request.if_none_match
+    if accept_encodings is None:
+        accept_encodings = request.accept_encodings
+    # Negotiate first: each encoding is its own representation, and a 304 must carry its ETag
+    encoding = accept_encodings.best_match(list(page.variants))
+    if if_none_match.contains(page.etag_for(encoding)):
+        resp = Response(status=304)
+    else:
+        resp = Response(page.variants[encoding] if encoding else page.body, mimetype=mimetype)
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+    resp.set_etag(page.etag_for(encoding))
+    resp.headers["Cache-Control"] = cache_control
+    resp.vary.add("Accept-Encoding")
+    return resp
+
 # ---------------- Routes ----------------
-@app.route("/")
-def home():
-    return render_template_string(HOME_TEMPLATE)
+portal = Blueprint("portal", __name__, cli_group=None)
+
+@portal.before_app_request
+def _ensure_job_workers():
+    # Picks up jobs and write-behind objects left by a previous process without waiting for a new submission
+    start_job_workers()
+    storage.start()
+    start_search_backfill()
 
-@app.route("/apply", methods=["GET", "POST"])
+@portal.route("/")
+def home():
+    return serve_static_page("home")
+
+@portal.route("/taxonomy.<version>.json")
+def taxonomy_json(version):
+    snapshot = taxonomy.current()
+    if version != snapshot.version:
+        # A page rendered before the file changed; send it to the current version, uncached
+        return redirect(url_for(".taxonomy_json", version=snapshot.version))
+    return serve_page(snapshot.page, "application/json", "public, max-age=31536000, immutable")
+
+@portal.route("/apply/uploads", methods=["POST"])
+def apply_uploads():
+    if not (DIRECT_UPLOADS and storage.can_presign):
+        abort(404)
+    if not admit_upload_grant(request.remote_addr):
+        return rate_limited_response()
+    body = request.get_json(silent=True) or {}
+    if not verify_csrf_token(body.get("csrf_token")):
+        return reject_json("csrf", "This form has expired. Please reload the page and submit again.")
+    files = body.get("files")
+    if not isinstance(files, dict) or set(files) != set(FILE_FIELD_LIMITS):
+        return reject_json("files_missing", "Valid photo and signature required.")
+    declared = {}
+    for field, meta in files.items():
+        if not isinstance(meta, dict) or meta.get("type") not in IMAGE_CONTENT_TYPES:
+            return reject_json("not_an_image", "Only JPG/PNG allowed.")
+        size = meta.get("size")
+        if not isinstance(size, int) or isinstance(size, bool) or not 0 < size <= FILE_FIELD_LIMITS[field]:
+            return reject_json("file_too_large", f"{field.capitalize()} exceeds {FILE_FIELD_LIMITS[field] / 2**20:g}MB.", 413)
+        digest = meta.get("sha256")
+        if not isinstance(digest, str) or not re.fullmatch(r"[0-9a-f]{64}", digest):
+            return reject_json("invalid_digest", "Could not read the selected files.")
+        declared[field] = {"type": meta["type"], "size": size, "sha256": digest}
+    return jsonify(grant_direct_uploads(declared))
+
+@portal.route("/apply", methods=["GET", "POST"])
 def apply():
     if request.method == "GET":
-        token = secrets.token_urlsafe(32)
-        return render_template_string(APPLY_TEMPLATE, niches=NICHES, csrf_token=token)
+        snapshot = taxonomy.current()
+        return TEMPLATES["apply"].render(niches=snapshot.niches, taxonomy_version=snapshot.version, csrf_token=issue_csrf_token(),
+                                         direct_uploads=DIRECT_UPLOADS and storage.can_presign)
+
+    # Shed abusive clients before the body is even parsed (the ASGI entry point admits
+    # before it receives the body and marks the environ)
+    if not request.environ.get(ADMITTED_ENVIRON_KEY) and not admit_submission(request.remote_addr):
+        return rate_limited_response()
 
-    token = request.form.get('csrf_token')
-    if not token or len(token) < 20:
-        abort(400)
+    try:
+        with metrics.time("parse"):
+            form, files = request.form, request.files
+    except UploadRejected as e:
+        return reject(e.reason, e.description, e.code)
+    except RequestEntityTooLarge:
+        return reject("request_too_large", f"Upload too large. Photo and signature must be under {UPLOAD_MAX_BYTES / 2**20:g}MB each.", 413)
+    if not verify_csrf_token(form.get('csrf_token')):
+        return reject("csrf", "This form has expired. Please reload the page and submit again.")
 
     try:
-        name = html.escape(request.form.get("name", "").strip()[:100])
-        email = html.escape(request.form.get("email", "").strip()[:100].lower())
-        role = request.form.get("role")
-        niche = request.form.get("niche")
-        sector = request.form.get("sector")
-        subsector = request.form.get("subsector") or ""
-        github_url = request.form.get("socials", "").strip()
-        agreed = request.form.get("agreement") == "on"
+        name = html.escape(form.get("name", "").strip()[:100])
+        email = normalize_email(form.get("email", ""))
+        role = form.get("role")
+        niche = form.get("niche")
+        sector = form.get("sector")
+        subsector = form.get("subsector") or ""
+        github_url = form.get("socials", "").strip()
+        agreed = form.get("agreement") == "on"
 
         if not all([name, email, role, niche, sector, github_url]):
-            return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ All fields are required.</h2>", 400
+            return reject("missing_fields", "All fields are required.")
 
         if role not in ["CoreTeam", "Internship"]:
-            return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ Invalid selection.</h2>", 400
+            return reject("invalid_role", "Invalid selection.")
 
-        if niche not in NICHES or sector not in NICHES[niche]:
-            return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ Invalid niche or specialization.</h2>", 400
+        # The parser has already refused known pairs if email and role came before the files
+        if applicant_keys.exists(email, role):
+            metrics.inc("lunvex_submission_duplicates_total", detected_by="precheck")
+            return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ Already applied for this pathway.</h2>", 400
 
-        if subsector and subsector not in NICHES[niche][sector]:
-            return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ Invalid sub-sector.</h2>", 400
+        rejection = taxonomy.current().rejection(niche, sector, subsector)
+        if rejection == "invalid_niche":
+            return reject("invalid_niche", "Invalid niche or specialization.")
+        if rejection == "invalid_subsector":
+            return reject("invalid_subsector", "Invalid sub-sector.")
 
         if not is_valid_github_url(github_url):
-            return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ Provide a valid GitHub URL (e.g., https://github.com/yourname)</h2>", 400
+            return reject("invalid_github_url", "Provide a valid GitHub URL (e.g., https://github.com/yourname)")
 
         if not agreed:
-            return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ Agreement is required.</h2>", 400
-
-        if role == "Internship" and request.form.get("unpaid_ack") != "on":
-            return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ Acknowledge unpaid nature.</h2>", 400
-
-        photo = request.files.get("photo")
-        signature = request.files.get("signature")
-        if not photo or not signature or not photo.filename or not signature.filename:
-            return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ Valid photo and signature required.</h2>", 400
-
-        if not (allowed_file(photo.filename) and allowed_file(signature.filename)):
-            return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ Only JPG/PNG allowed.</h2>", 400
-
-        photo_path = save_uploaded_file(photo, "photo")
-        signature_path = save_uploaded_file(signature, "signature")
-
-        if not (is_valid_image(photo_path) and is_valid_image(signature_path)):
-            os.remove(photo_path)
-            os.remove(signature_path)
-            return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ Invalid image format.</h2>", 400
+            return reject("agreement_missing", "Agreement is required.")
+
+        if role == "Internship" and form.get("unpaid_ack") != "on":
+            return reject("unpaid_ack_missing", "Acknowledge unpaid nature.")
+
+        upload_id = form.get("upload_id")
+        claimed = uploads = None
+        if upload_id:
+            # The browser PUT the images straight to storage; only the objects' headers are read here
+            try:
+                with metrics.time("validate"):
+                    claimed = claim_direct_uploads(upload_id, FILE_FIELD_LIMITS)
+            except UploadClaimFailed as e:
+                return reject(e.reason, e.message)
+        else:
+            photo = files.get("photo")
+            signature = files.get("signature")
+            if not photo or not signature or not photo.filename or not signature.filename:
+                return reject("files_missing", "Valid photo and signature required.")
+
+            if not (allowed_file(photo.filename) and allowed_file(signature.filename)):
+                return reject("file_extension", "Only JPG/PNG allowed.")
+
+            # Validated straight from the spooled request buffers; nothing is written to uploads/
+            with metrics.time("validate"):
+                images_ok = is_valid_image(photo.stream) and is_valid_image(signature.stream)
+            if not images_ok:
+                return reject("invalid_image", "Invalid image format.")
+            uploads = [photo.stream, signature.stream]
 
         applied_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-        submission_id = f"LX{int(time.time())}_{hashlib.sha256(email.encode()).hexdigest()[:8]}"
-
-        try:
-            with get_db() as conn:
-                conn.execute("""
-                    INSERT INTO applicants 
-                    (submission_id, name, email, role, niche, sector, subsector, github_url, photo_path, signature_path, agreed, applied_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (submission_id, name, email, role, niche, sector, subsector, github_url, photo_path, signature_path, True, applied_at))
-                conn.commit()
-        except sqlite3.IntegrityError:
-            os.remove(photo_path)
-            os.remove(signature_path)
-            return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ Already applied for this pathway.</h2>", 400
+        # The random half keeps the same email applying for both roles in one second from colliding
+        submission_id = f"LX{int(time.time())}_{hashlib.sha256(email.encode()).hexdigest()[:8]}{secrets.token_hex(4)}"
 
-        internal_pdf = generate_internal_pdf({
+        data = {
             "name": name,
             "email": email,
             "role": role,
@@ -822,22 +3419,43 @@ def apply():
             "subsector": subsector,
             "github_url": github_url,
             "applied_at": applied_at
-        }, photo_path, signature_path, submission_id)
-
-        receipt_pdf = generate_receipt_pdf(name, role, email, submission_id)
+        }
 
-        # Upload to R2 with per-user prefix
-        user_prefix = f"submissions/{submission_id}/"
-        upload_to_r2(internal_pdf, f"{user_prefix}INTERNAL_RECORD.pdf")
-        upload_to_r2(receipt_pdf, f"{user_prefix}RECEIPT.pdf")
-        upload_to_r2(photo_path, f"{user_prefix}photo.jpg")
-        upload_to_r2(signature_path, f"{user_prefix}signature.png")
-        backup_db_to_r2()
-
-        # Cleanup
-        for f in [photo_path, signature_path, internal_pdf, receipt_pdf]:
-            if os.path.exists(f):
-                os.remove(f)
+        # Blobs the index lacks are streamed from the request buffers to R2 before the row
+        for attempt in (1, 2):
+            if claimed is None:
+                photo_key, signature_key = store_blobs(uploads)
+            else:
+                photo_key, signature_key = claimed["photo"][0], claimed["signature"][0]
+            def commit_submission():
+                db.execute("insert_applicant", (submission_id, name, email, role, niche, sector, subsector, github_url, photo_key, signature_key, True, applied_at))
+                reference_blobs([photo_key, signature_key])
+                # PDF rendering and R2 uploads run in the job workers once the row is committed
+                enqueue_job(submission_id, "process_submission", {
+                    "data": data,
+                    "photo_key": photo_key,
+                    "signature_key": signature_key,
+                })
+
+            try:
+                with metrics.time("insert"):
+                    db_writer.run(commit_submission)
+                break
+            except BlobGone:
+                if attempt == 2 or claimed is not None:
+                    raise  # direct uploads cannot be re-sent from here; the browser retries
+            except sqlite3.IntegrityError:
+                # Only an existing (email, role) row makes this a duplicate; any other constraint
+                # (a submission_id collision) is a failure, not a reason to refuse this pathway.
+                # The images stay: blobs may be shared, and unreferenced ones are left to gc-blobs
+                if not applicant_keys.exists(email, role):
+                    raise
+                metrics.inc("lunvex_submission_duplicates_total", detected_by="constraint")
+                return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ Already applied for this pathway.</h2>", 400
+
+        applicant_keys.add(email, role)
+        metrics.inc("lunvex_submissions_accepted_total")
+        notify_job_workers()
 
         return f"""
         <div style="max-width:600px;margin:60px auto;text-align:center;font-family:'Inter',sans-serif;
@@ -851,7 +3469,9 @@ def apply():
               <em>Efaj will never DM you first — you must initiate contact.</em>
             </p>
             <p style="font-size:13px;color:#64748b;margin-top:20px;">
-                Submission ID: <code>{submission_id}</code>
+                Submission ID: <code>{submission_id}</code><br>
+                <a href="/status/{submission_id}" style="color:#0ea5e9;">Check processing status</a> ·
+                <a href="/receipt/{submission_id}?token={receipt_token(submission_id)}" style="color:#0ea5e9;">Download receipt</a>
             </p>
         </div>
         <div style="text-align:center;margin-top:20px;">
@@ -860,6 +3480,10 @@ def apply():
         """
 
     except Exception as e:
+        if is_db_locked(e):
+            app.logger.warning("Submission rejected: database busy")
+            metrics.inc("lunvex_submission_rejections_total", reason="db_busy")
+            return "<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ We are receiving many applications right now. Please try again in a minute.</h2>", 503, {"Retry-After": "30"}
         app.logger.exception("Submission failed")
         return """
         <div style="max-width:600px;margin:60px auto;text-align:center;font-family:'Inter',sans-serif;color:#ef4444;">
@@ -869,15 +3493,459 @@ def apply():
         </div>
         """, 500
 
-@app.route("/faqs")
+@portal.route("/status/<submission_id>")
+def submission_status(submission_id):
+    jobs = db.execute("jobs_for_submission", (submission_id,)).fetchall()
+    if not jobs:
+        abort(404)
+    if any(j["status"] == "failed" for j in jobs):
+        overall = "failed"
+    elif all(j["status"] == "done" for j in jobs):
+        overall = "done"
+    else:
+        overall = "processing"
+    return jsonify({
+        "submission_id": submission_id,
+        "status": overall,
+        "jobs": [dict(j) for j in jobs],
+    })
+
+@portal.route("/receipt/<submission_id>")
+def receipt(submission_id):
+    # 404 for a bad token too, so the endpoint never confirms that an id exists
+    if not SUBMISSION_ID_PATTERN.fullmatch(submission_id):
+        abort(404)
+    if not verify_receipt_token(submission_id, request.args.get("token", "")):
+        abort(404)
+    for _ in range(2):
+        found = receipts.open(submission_id)
+        if found is None:
+            break
+        path, etag = found
+        try:
+            # Conditional and Range requests (304, 206, 416) are answered by send_file
+            resp = send_file(path, mimetype="application/pdf", conditional=True, etag=etag,
+                             download_name=f"LUNVEX_RECEIPT_{submission_id}.pdf")
+        except FileNotFoundError:
+            continue  # evicted by another worker between the lookup and the open
+        resp.headers["Cache-Control"] = f"private, max-age={RECEIPT_MAX_AGE}"
+        return resp
+    miss = receipts.remembered(submission_id)
+    if miss and miss[1]:
+        return ("<h2 style='text-align:center;color:#ef4444;margin:40px;'>❌ Your receipt is still being prepared. "
+                "Please try again shortly.</h2>", 404, {"Retry-After": str(miss[1])})
+    abort(404)
+
+@portal.route("/metrics")
+def metrics_endpoint():
+    metrics.flush()
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@portal.route("/faqs")
 def faqs():
-    return render_template_string(FAQ_TEMPLATE)
+    return serve_static_page("faqs")
 
-@app.route("/investors")
+@portal.route("/investors")
 def investors():
-    return render_template_string(INVESTORS_TEMPLATE)
+    return serve_static_page("investors")
+
+# ---------------- Admin API ----------------
+ADMIN_COLUMNS = [
+    "id", "submission_id", "name", "email", "role", "niche", "sector", "subsector",
+    "github_url", "photo_path", "signature_path", "applied_at",
+]
+ADMIN_FILTERS = ("role", "niche", "sector", "subsector")
+
+def require_admin(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            abort(404)
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode()):
+            return jsonify({"error": "unauthorized"}), 401, {"WWW-Authenticate": "Bearer"}
+        return view(*args, **kwargs)
+    return wrapper
+
+# Queue, blob, cache and writer internals are for operators only
+@portal.route("/stats/db")
+@require_admin
+def db_stats():
+    return jsonify({**db.stats(), "applicant_keys": dict(applicant_keys.stats), "group_commit": db_writer.stats()})
+
+@portal.route("/stats/storage")
+@require_admin
+def storage_stats():
+    return jsonify({**storage.stats(), "receipts": receipts.snapshot()})
+
+@portal.route("/stats/pdf")
+@require_admin
+def pdf_render_stats():
+    return jsonify(pdf_render.pdf_stats())
+
+def encode_cursor(row):
+    return base64.urlsafe_b64encode(json.dumps([row["applied_at"], row["id"]]).encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        applied_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(applied_at), int(row_id)
+    except (ValueError, TypeError):
+        abort(400, "Invalid cursor")
+
+def applicant_query(args, cursor=None, limit=None):
+    # Newest first; keyset on (applied_at, id) so pages on an indexed filter are range scans
+    where, params = [], []
+    for field in ADMIN_FILTERS:
+        if args.get(field):
+            where.append(f"{field} = ?")
+            params.append(args[field])
+    if args.get("from"):
+        where.append("applied_at >= ?")
+        params.append(args["from"])
+    if args.get("to"):
+        where.append("applied_at < ?")
+        params.append(args["to"])
+    if cursor:
+        where.append("(applied_at, id) < (?, ?)")
+        params.extend(decode_cursor(cursor))
+    sql = f"SELECT {', '.join(ADMIN_COLUMNS)} FROM applicants"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY applied_at DESC, id DESC"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+def search_match(text):
+    # Each word becomes a quoted prefix term (ANDed), so input never reaches FTS5 query syntax.
+    # Single characters match whole tokens only: the prefix index starts at two.
+    terms = re.findall(r"\w+", text)[:SEARCH_TERMS_MAX]
+    return " ".join(f'"{t}"*' if len(t) > 1 else f'"{t}"' for t in terms)
+
+def _csv_safe(value):
+    # Keep spreadsheet apps from evaluating applicant-supplied cells as formulas
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@"):
+        return "'" + value
+    return value
+
+@portal.route("/admin/applicants")
+@require_admin
+def admin_applicants():
+    try:
+        limit = max(1, min(ADMIN_PAGE_MAX, int(request.args.get("limit", 50))))
+    except ValueError:
+        abort(400, "Invalid limit")
+    sql, params = applicant_query(request.args, request.args.get("cursor"), limit + 1)
+    rows = get_db().execute(sql, params).fetchall()
+    page = rows[:limit]
+    return jsonify({
+        "items": [dict(r) for r in page],
+        "next_cursor": encode_cursor(page[-1]) if len(rows) > limit else None,
+    })
+
+@portal.route("/admin/search")
+@require_admin
+def admin_search():
+    match = search_match(request.args.get("q", ""))
+    if not match:
+        abort(400, "Missing q")
+    try:
+        limit = max(1, min(SEARCH_RESULTS_MAX, int(request.args.get("limit", 20))))
+    except ValueError:
+        abort(400, "Invalid limit")
+    where, params = ["applicants_fts MATCH ?"], [match]
+    for field in ADMIN_FILTERS:
+        if request.args.get(field):
+            where.append(f"a.{field} = ?")
+            params.append(request.args[field])
+    columns = ", ".join(f"a.{c}" for c in ADMIN_COLUMNS)
+    sql = (f"SELECT {columns}, applicants_fts.rank AS score FROM applicants_fts "
+           f"JOIN applicants a ON a.id = applicants_fts.rowid WHERE {' AND '.join(where)} "
+           f"ORDER BY applicants_fts.rank LIMIT ?")
+    with metrics.time("search"):
+        rows = get_db().execute(sql, params + [limit]).fetchall()
+    return jsonify({
+        "query": match,
+        "items": [dict(r) for r in rows],
+        "index": search_index_state(),
+    })
+
+@portal.route("/admin/applicants/export.<fmt>")
+@require_admin
+def admin_export(fmt):
+    if fmt not in ("csv", "ndjson"):
+        abort(404)
+    sql, params = applicant_query(request.args)
+
+    def generate():
+        conn = db.open_reader()
+        try:
+            cur = conn.execute(sql, params)
+            if fmt == "csv":
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                writer.writerow(ADMIN_COLUMNS)
+                for row in cur:
+                    writer.writerow([_csv_safe(v) for v in row])
+                    if buf.tell() > 64 * 1024:
+                        yield buf.getvalue()
+                        buf.seek(0)
+                        buf.truncate()
+                yield buf.getvalue()
+            else:
+                for row in cur:
+                    yield json.dumps(dict(row)) + "\n"
+        finally:
+            conn.close()
+
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    filename = f"applicants-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Cache-Control": "no-store",
+    })
+
+# ---------------- PDF Regeneration ----------------
+def applicant_image_keys(row):
+    # Rows from before streamed uploads hold local paths; their R2 copies used fixed names
+    prefix = f"submissions/{row['submission_id']}/"
+    stored = (prefix, "blobs/")
+    photo = row["photo_path"] if row["photo_path"].startswith(stored) else f"{prefix}photo.jpg"
+    signature = row["signature_path"] if row["signature_path"].startswith(stored) else f"{prefix}signature.png"
+    return photo, signature
+
+class RegenCheckpoint:
+    # Rows finish out of order; only the longest finished prefix of ids is persisted
+    def __init__(self, path, restart=False):
+        self.path = path
+        state = {}
+        if not restart and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+        self.last_id = state.get("last_id", 0)
+        self.failed = dict(state.get("failed", {}))
+        self.done = state.get("done", 0)
+        self._order = []
+        self._finished = set()
+        self._saved_at = 0.0
+
+    def start(self, row_id):
+        self._order.append(row_id)
+        self.failed.pop(str(row_id), None)
+
+    def finish(self, row_id, error=None):
+        if error is None:
+            self.done += 1
+        else:
+            self.failed[str(row_id)] = error
+        self._finished.add(row_id)
+        while self._order and self._order[0] in self._finished:
+            head = self._order.pop(0)
+            self._finished.discard(head)
+            self.last_id = max(self.last_id, head)
+        if time.monotonic() - self._saved_at >= 1:
+            self.save()
+
+    def save(self):
+        _write_json_atomic(self.path, {"last_id": self.last_id, "done": self.done, "failed": self.failed})
+        self._saved_at = time.monotonic()
+
+def _regen_rows(checkpoint):
+    # Keyset batches keep the read snapshot short; earlier failures are retried first
+    retry = sorted(int(i) for i in checkpoint.failed)
+    if retry:
+        with closing(db.open_reader()) as conn:
+            yield from conn.execute(
+                f"SELECT * FROM applicants WHERE id IN ({','.join('?' * len(retry))}) ORDER BY id", retry).fetchall()
+    after = checkpoint.last_id
+    while True:
+        with closing(db.open_reader()) as conn:
+            rows = conn.execute("SELECT * FROM applicants WHERE id > ? ORDER BY id LIMIT ?",
+                                (after, REGEN_BATCH_SIZE)).fetchall()
+        if not rows:
+            return
+        yield from (row for row in rows if row["id"] not in retry)
+        after = rows[-1]["id"]
+
+def _regen_one(renderers, row):
+    data = {k: row[k] for k in ("name", "email", "role", "niche", "sector", "subsector", "github_url", "applied_at")}
+    submission_id = row["submission_id"]
+    photo_key, signature_key = applicant_image_keys(row)
+    photo, signature = storage.get_bytes(photo_key), storage.get_bytes(signature_key)
+    internal_pdf, receipt_pdf, _ = renderers.submit(
+        pdf_render.render_submission_pdfs, data, photo, signature, submission_id).result()
+    try:
+        publish_submission(submission_id, internal_pdf, receipt_pdf, photo_key, signature_key, photo, signature, data)
+        receipts.invalidate(submission_id)
+    finally:
+        for f in (internal_pdf, receipt_pdf):
+            if os.path.exists(f):
+                os.remove(f)
+
+def regenerate_pdfs(workers, concurrency, checkpoint_path=REGEN_CHECKPOINT, restart=False, echo=print):
+    checkpoint = RegenCheckpoint(checkpoint_path, restart)
+    started = last_report = time.perf_counter()
+    processed = 0
+    # Start the renderers up front and pay the reportlab import once each
+    with renderer_pool(workers) as renderers, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="regen") as pipeline:
+        for f in [renderers.submit(pdf_render.load_pdf_engine) for _ in range(workers)]:
+            f.result()
+        in_flight = {}
+
+        def settle(finished):
+            nonlocal processed, last_report
+            for future in finished:
+                row_id = in_flight.pop(future)
+                error = future.exception()
+                if error is not None:
+                    app.logger.error("Regenerating applicant %s failed: %s", row_id, error)
+                checkpoint.finish(row_id, None if error is None else str(error))
+                processed += 1
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                last_report = now
+                echo(f"{processed} processed ({len(checkpoint.failed)} failed), "
+                     f"{processed / (now - started):.1f} applicants/s, checkpoint at id {checkpoint.last_id}")
+
+        for row in _regen_rows(checkpoint):
+            if len(in_flight) >= concurrency * 2:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                settle(finished)
+            checkpoint.start(row["id"])
+            in_flight[pipeline.submit(_regen_one, renderers, row)] = row["id"]
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            settle(finished)
+    checkpoint.save()
+    seconds = time.perf_counter() - started
+    return {
+        "processed": processed,
+        "failed": sorted(int(i) for i in checkpoint.failed),
+        "seconds": round(seconds, 3),
+        "per_second": round(processed / seconds, 2) if seconds else None,
+        "last_id": checkpoint.last_id,
+    }
+
+@portal.cli.command("restore-db")
+@click.option("--instance", default=INSTANCE_ID, show_default=True, help="Instance whose replica to restore.")
+@click.option("--output", default=DATABASE, show_default=True, help="Path of the rebuilt database.")
+def restore_db_command(instance, output):
+    """Rebuild the SQLite database from the R2 base snapshot and deltas."""
+    manifest = restore_db(instance, output)
+    click.echo(f"Restored {output} from {manifest['base']} + {len(manifest['deltas'])} deltas (seq {manifest['seq']})")
+
+@portal.cli.command("migrate-db")
+@click.option("--backfill/--no-backfill", default=True, show_default=True, help="Also finish indexing older applicants for search.")
+def migrate_db_command(backfill):
+    """Apply pending schema migrations (create_app does this too) and run pending backfills."""
+    click.echo(f"Schema at version {migrate_db()} of {MIGRATIONS[-1][0]}")
+    if backfill:
+        click.echo(f"Indexed {backfill_search_index()} applicants for search")
+
+@portal.cli.command("gc-blobs")
+@click.option("--grace-hours", default=BLOB_GC_GRACE_SECONDS / 3600, show_default=True, help="Keep unreferenced blobs younger than this.")
+@click.option("--dry-run", is_flag=True, help="Only report what would be deleted.")
+def gc_blobs_command(grace_hours, dry_run):
+    """Delete content-addressed images no applicant references."""
+    result = collect_blobs(grace_hours * 3600, dry_run)
+    if dry_run:
+        click.echo(f"{result['candidates']} unreferenced blobs and {result['grants_expired']} expired "
+                   f"upload grants would be deleted")
+    else:
+        click.echo(f"Deleted {result['deleted']} of {result['candidates']} unreferenced blobs "
+                   f"({result['bytes_freed'] / 2**20:.1f} MB) and {result['grants_expired']} expired upload grants")
+
+@portal.cli.command("regen-pdfs")
+@click.option("--workers", default=os.cpu_count() or 1, show_default=True, help="Rendering processes.")
+@click.option("--concurrency", default=UPLOAD_CONCURRENCY, show_default=True, help="Applicants fetched/uploaded at once.")
+@click.option("--checkpoint", default=REGEN_CHECKPOINT, show_default=True, help="Progress file used to resume.")
+@click.option("--restart", is_flag=True, help="Ignore the checkpoint and start from the first applicant.")
+def regen_pdfs_command(workers, concurrency, checkpoint, restart):
+    """Re-render and re-upload the internal and receipt PDFs of every applicant."""
+    summary = regenerate_pdfs(workers, concurrency, checkpoint, restart, echo=click.echo)
+    click.echo(f"Regenerated {summary['processed'] - len(summary['failed'])} applicants in {summary['seconds']}s "
+               f"({summary['per_second']}/s); {len(summary['failed'])} failed")
+    if summary["failed"]:
+        click.echo(f"Failed ids (retried on the next run): {', '.join(map(str, summary['failed']))}")
+
+# ---------------- App Factory ----------------
+BOOT_STATS = {"cold_start_seconds": None, "warmup_seconds": None}
+_storage_readiness = {"checked_at": 0.0, "ok": False, "error": None}
+_storage_readiness_lock = threading.Lock()
+
+def warm_up():
+    # Pays the heavy imports and client setup off the request path
+    started = time.perf_counter()
+    try:
+        Image.init()
+        # Everything the first submission's PDFs would otherwise import on the request path
+        pdf_render.load_pdf_engine()
+        for role in ("CoreTeam", "Internship"):
+            pdf_render.agreement_layout(role)
+        storage.warm()
+    except Exception:
+        app.logger.exception("Warm-up failed")
+    BOOT_STATS["warmup_seconds"] = round(time.perf_counter() - started, 4)
+
+def check_storage_ready():
+    # Cached so frequent readiness probes do not turn into a HEAD request each
+    with _storage_readiness_lock:
+        if time.time() - _storage_readiness["checked_at"] < READY_CHECK_TTL:
+            return _storage_readiness["ok"], _storage_readiness["error"]
+        try:
+            storage.check()
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        _storage_readiness.update(checked_at=time.time(), ok=ok, error=error)
+        return ok, error
+
+@portal.route("/healthz")
+def healthz():
+    return jsonify({"status": "ok", **BOOT_STATS})
+
+@portal.route("/readyz")
+def readyz():
+    checks = {}
+    try:
+        get_db().execute("SELECT 1").fetchone()
+        checks["database"] = "ok"
+    except sqlite3.Error as e:
+        checks["database"] = str(e)
+    storage_ok, storage_error = check_storage_ready()
+    checks["storage"] = "ok" if storage_ok else storage_error
+    ready = all(v == "ok" for v in checks.values())
+    return jsonify({"ready": ready, "checks": checks, **BOOT_STATS}), 200 if ready else 503
+
+def create_app():
+    app = Flask(__name__)
+    app.request_class = PortalRequest
+    if PROXY_HOPS:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS, x_proto=PROXY_HOPS)
+    # Both files at their limits plus generous room for the text fields and multipart framing
+    app.config["MAX_CONTENT_LENGTH"] = sum(FILE_FIELD_LIMITS.values()) + 64 * 1024
+    os.makedirs(PDF_FOLDER, exist_ok=True)
+    os.makedirs(BACKUP_FOLDER, exist_ok=True)
+    os.makedirs(METRICS_FOLDER, exist_ok=True)
+    storage.check_config()
+    migrate_db()
+    rate_limiter.init()
+    applicant_keys.warm()
+    taxonomy.current()  # a missing or invalid taxonomy file fails startup
+    build_template_registry(app)
+    app.register_blueprint(portal)
+    if WARMUP_ON_START:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    BOOT_STATS["cold_start_seconds"] = round(time.perf_counter() - _PROCESS_STARTED, 4)
+    print(f"✅ Portal ready in {BOOT_STATS['cold_start_seconds'] * 1000:.0f}ms")
+    return app
+
+app = create_app()
 
 if __name__ == "__main__":
-    init_db()
+    start_job_workers()
     port = int(os.environ.get("PORT", 10000))
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,369 @@
+"""ASGI entry point: the same portal, served from an event loop.
+
+    uvicorn asgi:application --workers 2
+
+Static pages are answered on the loop. Every other request runs through the Flask app on a
+request thread, with the body streamed into Werkzeug's parser as it arrives so a bad part
+still stops the upload early. Submission jobs run as asyncio tasks: R2 reads and writes on a
+separate job pool, so jobs never queue behind uploads, and PDF rendering in a process pool.
+The WSGI entry point (app:app) is unchanged.
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from werkzeug.http import parse_accept_header, parse_etags
+
+import app as portal
+import pdf_render
+
+# An upload holds its request thread while the body streams in, so this bounds in-flight requests
+ASGI_THREADS = int(os.getenv("ASGI_THREADS", "512"))
+ASGI_JOB_THREADS = int(os.getenv("ASGI_JOB_THREADS", "64"))
+ASGI_JOB_CONCURRENCY = int(os.getenv("ASGI_JOB_CONCURRENCY", "32"))
+PDF_RENDER_PROCESSES = int(os.getenv("PDF_RENDER_PROCESSES", str(os.cpu_count() or 1)))
+RESPONSE_QUEUE_CHUNKS = 8
+
+STATIC_ROUTES = {"/": "home", "/faqs": "faqs", "/investors": "investors"}
+
+
+class ClientDisconnected(OSError):
+    pass
+
+
+class RequestBody(io.RawIOBase):
+    # wsgi.input for one request. Each read pulls the next ASGI message from the loop, so the
+    # parser consumes the upload as it arrives and stops the transfer when it rejects a part.
+    # Werkzeug turns ClientDisconnected into its own ClientDisconnected (400).
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = memoryview(b"")
+        self._more = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer and self._more:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message["type"] == "http.disconnect":
+                self._more = False
+                raise ClientDisconnected()
+            self._more = message.get("more_body", False)
+            self._buffer = memoryview(message.get("body", b""))
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+def _client_address(scope, headers):
+    # Mirrors ProxyFix(x_for=PROXY_HOPS) so admission sees the same address as Flask
+    client = (scope.get("client") or (None, None))[0]
+    if portal.PROXY_HOPS and "x-forwarded-for" in headers:
+        hops = [v.strip() for v in headers["x-forwarded-for"].split(",")]
+        if len(hops) >= portal.PROXY_HOPS:
+            return hops[-portal.PROXY_HOPS]
+    return client
+
+
+def _build_environ(scope, headers, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.input_terminated": True,  # RequestBody ends with the last ASGI message
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in headers.items():
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+        elif name == "content-length":
+            environ["CONTENT_LENGTH"] = value
+        else:
+            environ[f"HTTP_{name.upper().replace('-', '_')}"] = value
+    return environ
+
+
+async def _send_simple(send, status, body, content_type="text/html; charset=utf-8", extra_headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode()),
+                    *extra_headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AsyncJobRunner:
+    # Claims jobs from the SQLite outbox and keeps up to `concurrency` of them in flight
+    def __init__(self, io_pool, renderers, concurrency):
+        self.io_pool = io_pool
+        self.renderers = renderers
+        self.slots = asyncio.Semaphore(concurrency)
+        self.wakeup = asyncio.Event()
+        self.tasks = set()
+
+    async def io(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.io_pool, fn, *args)
+
+    async def run(self):
+        while True:
+            await self.slots.acquire()
+            try:
+                job = await self.io(portal.claim_job)
+            except Exception:
+                portal.app.logger.exception("Job claim failed")
+                job = None
+            if job is None:
+                self.slots.release()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), portal.JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                continue
+            task = asyncio.create_task(self._run_job(job))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _run_job(self, job):
+        try:
+            await ASYNC_JOB_HANDLERS[job["kind"]](self, job)
+        except Exception as e:
+            status = await self.io(portal.fail_job, job, e)
+            portal.app.logger.exception("Job %s (%s) for %s failed, now %s",
+                                        job["id"], job["kind"], job["submission_id"], status)
+        else:
+            await self.io(portal.complete_job, job["id"])
+        finally:
+            self.slots.release()
+
+    async def process_submission(self, job):
+        # Same stages as app.process_submission_job, with every blocking call off the loop
+        payload = json.loads(job["payload"])
+        data = payload["data"]
+        submission_id = job["submission_id"]
+
+        await self.io(portal.set_job_stage, job["id"], "rendering")
+        photo, signature = await asyncio.gather(
+            self.io(portal.storage.get_bytes, payload["photo_key"]),
+            self.io(portal.storage.get_bytes, payload["signature_key"]),
+        )
+        internal_pdf, receipt_pdf, timings = await asyncio.get_running_loop().run_in_executor(
+            self.renderers, pdf_render.render_submission_pdfs, data, photo, signature, submission_id)
+        for stage, seconds in timings.items():
+            portal.metrics.observe(stage, seconds)
+        try:
+            await self.io(portal.set_job_stage, job["id"], "uploading")
+            await self.io(portal.publish_submission, submission_id, internal_pdf, receipt_pdf,
+                          payload["photo_key"], payload["signature_key"], photo, signature, data)
+            await self.io(portal.set_job_stage, job["id"], "backup")
+            await self.io(portal.backup_db)
+        finally:
+            for f in (internal_pdf, receipt_pdf):
+                if os.path.exists(f):
+                    os.remove(f)
+
+
+ASYNC_JOB_HANDLERS = {
+    "process_submission": AsyncJobRunner.process_submission,
+}
+
+
+class PortalASGI:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.max_body = flask_app.config["MAX_CONTENT_LENGTH"]
+        self.request_pool = None
+        self.job_pool = None
+        self.renderers = None
+        self.runner = None
+        self._runner_task = None
+        self._startup_lock = None
+
+    async def startup(self):
+        if self.request_pool is not None:
+            return
+        if self._startup_lock is None:
+            self._startup_lock = asyncio.Lock()
+        async with self._startup_lock:
+            if self.request_pool is None:
+                await self._start()
+
+    async def _start(self):
+        loop = asyncio.get_running_loop()
+        # Renderers are spawned (see renderer_pool) and load reportlab once each
+        self.renderers = portal.renderer_pool(PDF_RENDER_PROCESSES)
+        await asyncio.gather(*[loop.run_in_executor(self.renderers, pdf_render.load_pdf_engine)
+                               for _ in range(PDF_RENDER_PROCESSES)])
+        self.job_pool = ThreadPoolExecutor(max_workers=ASGI_JOB_THREADS, thread_name_prefix="asgi-job")
+        self.request_pool = ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix="asgi")
+        self.runner = AsyncJobRunner(self.job_pool, self.renderers, ASGI_JOB_CONCURRENCY)
+        portal.use_external_job_runner(lambda: loop.call_soon_threadsafe(self.runner.wakeup.set))
+        self._runner_task = asyncio.create_task(self.runner.run())
+
+    async def shutdown(self):
+        if self._runner_task is None:
+            return
+        self._runner_task.cancel()
+        # Jobs still running keep their lease and are retried if they do not finish here
+        if self.runner.tasks:
+            await asyncio.wait(self.runner.tasks, timeout=30)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.job_pool, portal.db_replicator.flush)
+        await loop.run_in_executor(self.job_pool, portal.metrics.flush)
+        self.job_pool.shutdown(wait=False)
+        self.request_pool.shutdown(wait=False)
+        self.renderers.shutdown(wait=False, cancel_futures=True)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.startup()  # for servers that skip the lifespan protocol
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            # No websocket routes: closing before accept makes the server refuse the handshake
+            await receive()
+            await send({"type": "websocket.close", "code": 1000})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        path, method = scope["path"], scope["method"]
+
+        if path in STATIC_ROUTES and method in ("GET", "HEAD"):
+            resp = portal.serve_static_page(
+                STATIC_ROUTES[path],
+                if_none_match=parse_etags(headers.get("if-none-match")),
+                accept_encodings=parse_accept_header(headers.get("accept-encoding")),
+            )
+            await send({
+                "type": "http.response.start",
+                "status": resp.status_code,
+                "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in resp.headers.items()],
+            })
+            await send({"type": "http.response.body", "body": b"" if method == "HEAD" else resp.get_data()})
+            return
+
+        admitted = False
+        if path == "/apply" and method == "POST":
+            # Shed over-limit clients before spending bandwidth on their upload
+            client = _client_address(scope, headers)
+            if not await self._io(portal.admit_submission, client):
+                body, status, extra = portal.rate_limited_response()
+                await _send_simple(send, status, body.encode(),
+                                   extra_headers=[(k.lower().encode(), v.encode()) for k, v in extra.items()])
+                return
+            admitted = True
+
+        declared = headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > self.max_body:
+            await _send_simple(send, 413, HTTPStatus(413).phrase.encode(), "text/plain")
+            return
+        body = RequestBody(receive, asyncio.get_running_loop())
+        environ = _build_environ(scope, headers, body)
+        if admitted:
+            environ[portal.ADMITTED_ENVIRON_KEY] = True
+        try:
+            await self._run_wsgi(environ, send)
+        finally:
+            body.close()
+
+    async def _io(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.request_pool, fn, *args)
+
+    async def _run_wsgi(self, environ, send):
+        # The app and its response iterator run on one request thread (stream_with_context needs
+        # that); undeclared bodies over MAX_CONTENT_LENGTH get Werkzeug's 413; chunks cross to the
+        # loop through a bounded queue for backpressure
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(RESPONSE_QUEUE_CHUNKS)
+        started = {}
+        done = object()
+
+        def put(item):
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def start_response(status, response_headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in response_headers]
+
+        def run():
+            try:
+                result = self.flask_app(environ, start_response)
+                try:
+                    put(("start", None))
+                    for chunk in result:
+                        if chunk:
+                            put(("body", chunk))
+                finally:
+                    if hasattr(result, "close"):
+                        result.close()
+            except BaseException as e:
+                put(("error", e))
+            finally:
+                put((done, None))
+
+        worker = loop.run_in_executor(self.request_pool, run)
+        sent_start = False
+        stopped = False  # client went away, or the error response is already out
+        while True:
+            kind, item = await queue.get()
+            if kind is done:
+                break
+            if stopped:
+                continue  # keep draining so the producer thread is never stuck on a full queue
+            try:
+                if kind == "start":
+                    await send({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+                    sent_start = True
+                elif kind == "body":
+                    await send({"type": "http.response.body", "body": item, "more_body": True})
+                elif kind == "error":
+                    portal.app.logger.error("WSGI app failed under ASGI", exc_info=item)
+                    if not sent_start:
+                        await _send_simple(send, 500, HTTPStatus(500).phrase.encode(), "text/plain")
+                    stopped = True
+            except OSError:
+                stopped = True
+        await worker
+        if sent_start and not stopped:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+application = PortalASGI(portal.app)
@@ -0,0 +1,178 @@
+"""PDF renderer microbenchmark: legacy per-call drawing vs the cached-layout engine.
+
+Run from the repository root:
+
+    python benchmarks/bench_pdf.py --iterations 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.chdir(tempfile.mkdtemp(prefix="lunvex-bench-"))
+import pdf_render  # noqa: E402
+from reportlab import rl_config  # noqa: E402
+from reportlab.lib import colors  # noqa: E402
+from reportlab.lib.pagesizes import A4  # noqa: E402
+from reportlab.pdfgen import canvas  # noqa: E402
+
+
+# Verbatim copies of the renderers before the layout cache, kept as the baseline
+def legacy_generate_internal_pdf(data, photo_path, signature_path, submission_id):
+    pdf_path = os.path.join(pdf_render.PDF_FOLDER, f"INTERNAL_{submission_id}.pdf")
+    c = canvas.Canvas(pdf_path, pagesize=A4)
+    w, h = A4
+
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, h - 50, "Lunvex Labs – Internal Application Record")
+    c.setFont("Helvetica", 10)
+    c.setFillColor(colors.gray)
+    c.drawString(50, h - 70, f"Submission ID: {submission_id} | {data['applied_at']} UTC")
+
+    y = h - 110
+    c.setFont("Helvetica-Bold", 12)
+    c.setFillColor(colors.black)
+    c.drawString(50, y, "APPLICANT DETAILS")
+    y -= 20
+    c.setFont("Helvetica", 11)
+
+    fields = [
+        ("Name", data["name"]),
+        ("Email", data["email"]),
+        ("GitHub", data["github_url"]),
+        ("Role", "Core Team" if data["role"] == "CoreTeam" else "Intern"),
+        ("Niche", data["niche"]),
+        ("Specialization", data["sector"]),
+        ("Sub-Sector", data.get("subsector") or "N/A"),
+    ]
+    for label, val in fields:
+        c.drawString(50, y, f"{label}:")
+        c.drawString(180, y, str(val)[:80])
+        y -= 20
+
+    y = y - 20
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, y, "ACCEPTED AGREEMENT")
+    y -= 25
+    c.setFont("Helvetica", 9)
+
+    txt = pdf_render.TEAM_AGREEMENT_TEXT if data["role"] == "CoreTeam" else pdf_render.INTERNSHIP_AGREEMENT_TEXT
+    txt = txt.replace("[Full Name]", data["name"])
+    txt = txt.replace("[Date]", data["applied_at"].split()[0])
+    if data["role"] == "Internship":
+        start = data["applied_at"].split()[0]
+        end = (datetime.fromisoformat(data["applied_at"].replace(' ', 'T')) + timedelta(days=150)).strftime("%Y-%m-%d")
+        txt = txt.replace("[Start Date]", start).replace("[End Date]", end)
+
+    for line in txt.split('\n'):
+        if y < 60:
+            c.showPage()
+            y = h - 50
+        c.drawString(50, y, line[:90])
+        y -= 14
+
+    c.saveState()
+    c.setFont("Helvetica", 40)
+    c.setFillColorRGB(0.9, 0.9, 0.9, 0.5)
+    c.drawCentredString(w / 2, h / 2, "CONFIDENTIAL")
+    c.restoreState()
+    c.save()
+    return pdf_path
+
+
+def legacy_generate_receipt_pdf(name, role, email, submission_id):
+    pdf_path = os.path.join(pdf_render.PDF_FOLDER, f"RECEIPT_{submission_id}.pdf")
+    c = canvas.Canvas(pdf_path, pagesize=A4)
+    w, h = A4
+
+    c.setFillColor(colors.Color(0.05, 0.1, 0.2, alpha=0.95))
+    c.rect(0, h - 100, w, 100, fill=1)
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 26)
+    c.drawCentredString(w / 2, h - 50, "LUNVEX LABS")
+    c.setFont("Helvetica", 12)
+    c.setFillColor(colors.Color(0.8, 0.9, 1.0))
+    c.drawCentredString(w / 2, h - 75, "Global Technology Initiative")
+
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 18)
+    c.drawCentredString(w / 2, h - 130, "✅ Application Submitted")
+
+    y = h - 170
+    info = [
+        f"Applicant: {name}",
+        f"Pathway: {'Core Team' if role == 'CoreTeam' else 'Internship'}",
+        f"Email: {email}",
+        f"Submission ID: {submission_id}",
+        f"Submitted: {datetime.now(timezone.utc).strftime('%B %d, %Y at %I:%M %p UTC')}"
+    ]
+    for line in info:
+        c.drawString(80, y, line)
+        y -= 28
+
+    c.setFont("Helvetica", 12)
+    c.setFillColor(colors.Color(0.05, 0.65, 0.9))
+    c.drawString(80, y - 20, "Next Step:")
+    c.setFont("Helvetica", 11)
+    c.setFillColor(colors.black)
+    c.drawString(80, y - 40, "Contact the Founder on Telegram for confirmation:")
+    c.setFillColor(colors.blue)
+    c.drawString(80, y - 60, "@EfajTahamidRIFAT")
+
+    c.setFillColor(colors.gray)
+    c.setFont("Helvetica", 9)
+    c.drawCentredString(w / 2, 50, "This receipt confirms submission only. No selection is guaranteed.")
+    c.setFillColor(colors.Color(0.05, 0.65, 0.9))
+    c.rect(0, 0, w, 8, fill=1)
+    c.save()
+    return pdf_path
+
+
+def sample_data(i, role):
+    return {
+        "name": f"Bench Applicant {i}",
+        "email": f"bench{i}@example.com",
+        "role": role,
+        "niche": "Cybersecurity",
+        "sector": "Penetration Testing",
+        "subsector": "Web App Pentesting",
+        "github_url": f"https://github.com/bench{i}",
+        "applied_at": "2026-01-15 10:30:00",
+    }
+
+
+def bench(label, render_internal, render_receipt, iterations):
+    # Alternate roles so both agreement layouts are exercised
+    started = time.perf_counter()
+    for i in range(iterations):
+        role = "CoreTeam" if i % 2 else "Internship"
+        data = sample_data(i, role)
+        sid = f"BENCH{i}"
+        for path in (render_internal(data, None, None, sid), render_receipt(data["name"], role, data["email"], sid)):
+            os.remove(path)
+    elapsed = time.perf_counter() - started
+    rate = iterations * 2 / elapsed
+    print(f"{label:<8} {iterations * 2:>6} PDFs in {elapsed:7.3f}s  {rate:8.1f} PDFs/sec")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200, help="applicants to render (2 PDFs each)")
+    args = parser.parse_args()
+
+    os.makedirs(pdf_render.PDF_FOLDER, exist_ok=True)
+    bench("warmup", pdf_render.generate_internal_pdf, pdf_render.generate_receipt_pdf, 5)
+    rl_config.useA85 = 1  # reportlab default, as used before the engine
+    before = bench("legacy", legacy_generate_internal_pdf, legacy_generate_receipt_pdf, args.iterations)
+    rl_config.useA85 = 0
+    after = bench("engine", pdf_render.generate_internal_pdf, pdf_render.generate_receipt_pdf, args.iterations)
+    print(f"speedup  {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,471 @@
+"""End-to-end load test and microbenchmarks for the portal, fully offline.
+
+Drives the Flask app in-process with realistic multipart submissions (real
+JPEG photos and PNG signatures, both roles, a share of duplicate emails)
+against an in-memory R2 stand-in with configurable latency (directly, or
+behind the write-behind tier), or against the local and in-memory storage
+backends, then times the hot building blocks on their own. Results are printed and written as JSON
+so runs can be diffed against each other.
+
+Run from the repository root:
+
+    python benchmarks/bench_portal.py --submissions 200 --concurrency 8 --s3-latency-ms 40
+    python benchmarks/bench_portal.py --storage write-behind --s3-latency-ms 100
+    python benchmarks/bench_portal.py --baseline bench_results.json --output bench_new.json
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+os.environ.setdefault("WARMUP_ON_START", "0")
+os.environ.setdefault("R2_BUCKET_NAME", "bench")
+os.environ.setdefault("STORAGE_BACKEND", "memory")  # replaced by --storage after import
+os.environ.setdefault("PROXY_HOPS", "1")  # each simulated applicant gets its own X-Forwarded-For
+_WORKDIR = tempfile.mkdtemp(prefix="lunvex-bench-")
+_ORIGINAL_CWD = os.getcwd()
+os.chdir(_WORKDIR)
+import app as portal  # noqa: E402
+import pdf_render  # noqa: E402
+from offline_s3 import OfflineS3  # noqa: E402
+from PIL import Image  # noqa: E402
+
+CSRF_FIELD = re.compile(r'name="csrf_token" value="([^"]+)"')
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples, wall_seconds=None):
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    summary = {
+        "count": len(samples),
+        "p50_ms": None,
+        "p95_ms": None,
+        "p99_ms": None,
+        "max_ms": None,
+        "mean_ms": None,
+    }
+    if samples:
+        summary.update({
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 95) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "max_ms": round(max(samples) * 1000, 3),
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        })
+    if wall_seconds:
+        summary["per_sec"] = round(len(samples) / wall_seconds, 2)
+    return summary
+
+
+# ---------- Fixtures ----------
+def make_photo(rng, size=(1200, 1500)):
+    """A noisy portrait-sized JPEG, roughly what a phone upload compresses to."""
+    noise = Image.effect_noise(size, rng.randint(20, 60)).convert("RGB")
+    tint = Image.new("RGB", size, (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+    buf = io.BytesIO()
+    Image.blend(noise, tint, 0.4).save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+
+def make_signature(rng, size=(800, 300)):
+    img = Image.new("L", size, 255)
+    pixels = img.load()
+    x, y = 20, size[1] // 2
+    for _ in range(4000):
+        x = min(size[0] - 3, max(2, x + rng.choice((-1, 1, 1, 2))))
+        y = min(size[1] - 3, max(2, y + rng.randint(-2, 2)))
+        for dx in range(-1, 2):
+            for dy in range(-1, 2):
+                pixels[x + dx, y + dy] = 20
+    buf = io.BytesIO()
+    img.save(buf, "PNG", optimize=True)
+    return buf.getvalue()
+
+
+def build_workload(count, duplicate_ratio, seed, photos, signatures):
+    """Form payloads for `count` submissions; a share reuse an earlier (email, role)."""
+    rng = random.Random(seed)
+    taxonomy = sorted(portal.taxonomy.current().triples)
+    submissions = []
+    for i in range(count):
+        client_ip = f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+        if submissions and rng.random() < duplicate_ratio:
+            form = dict(rng.choice(submissions)["form"])
+            submissions.append({"form": form, "duplicate": True, "ip": client_ip,
+                                "photo": rng.choice(photos), "signature": rng.choice(signatures)})
+            continue
+        role = rng.choice(("CoreTeam", "Internship"))
+        niche, sector, subsector = rng.choice(taxonomy)
+        form = {
+            "name": f"Bench Applicant {i}",
+            "email": f"applicant{i}.{seed}@example.com",
+            "role": role,
+            "niche": niche,
+            "sector": sector,
+            "subsector": subsector,
+            "socials": f"https://github.com/bench-user-{i}",
+            "agreement": "on",
+        }
+        if role == "Internship":
+            form["unpaid_ack"] = "on"
+        submissions.append({"form": form, "duplicate": False, "ip": client_ip,
+                            "photo": rng.choice(photos), "signature": rng.choice(signatures)})
+    return submissions
+
+
+# ---------- Load test ----------
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.statuses = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, status):
+        with self._lock:
+            self.samples.setdefault(route, []).append(seconds)
+            codes = self.statuses.setdefault(route, {})
+            codes[str(status)] = codes.get(str(status), 0) + 1
+
+
+def timed(recorder, route, call):
+    start = time.perf_counter()
+    response = call()
+    recorder.record(route, time.perf_counter() - start, response.status_code)
+    return response
+
+
+def upload_direct(client, recorder, s3, csrf_token, submission):
+    """Plays the browser's side of a presigned upload; returns the upload id."""
+    blobs = {"photo": (submission["photo"], "image/jpeg"), "signature": (submission["signature"], "image/png")}
+    files = {
+        field: {"type": content_type, "size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+        for field, (data, content_type) in blobs.items()
+    }
+    grant = timed(recorder, "POST /apply/uploads", lambda: client.post(
+        "/apply/uploads", json={"csrf_token": csrf_token, "files": files}))
+    if grant.status_code != 200:
+        return ""
+    for field, upload in grant.json["uploads"].items():
+        bucket, key = urlsplit(upload["url"]).path.lstrip("/").split("/", 1)
+        s3.put_object(Bucket=bucket, Key=key, Body=blobs[field][0], ContentType=upload["headers"]["Content-Type"])
+    return grant.json["upload_id"]
+
+
+def submit(client, recorder, submission, direct_to=None):
+    client.environ_base["HTTP_X_FORWARDED_FOR"] = submission["ip"]
+    page = timed(recorder, "GET /apply", lambda: client.get("/apply"))
+    match = CSRF_FIELD.search(page.get_data(as_text=True))
+    form = dict(submission["form"])
+    form["csrf_token"] = match.group(1) if match else ""
+    if direct_to is not None:
+        form["upload_id"] = upload_direct(client, recorder, direct_to, form["csrf_token"], submission)
+        content_type = "application/x-www-form-urlencoded"
+    else:
+        form["photo"] = (io.BytesIO(submission["photo"]), "photo.jpg", "image/jpeg")
+        form["signature"] = (io.BytesIO(submission["signature"]), "signature.png", "image/png")
+        content_type = "multipart/form-data"
+    response = timed(recorder, "POST /apply", lambda: client.post(
+        "/apply", data=form, content_type=content_type))
+    accepted_at = time.perf_counter()
+    submission_id = re.search(r"/status/([\w-]+)", response.get_data(as_text=True))
+    if submission_id:
+        submission_id = submission_id.group(1)
+        timed(recorder, "GET /status", lambda: client.get(f"/status/{submission_id}"))
+    for path in ("/", "/faqs"):
+        timed(recorder, f"GET {path}", lambda: client.get(path, headers={"Accept-Encoding": "gzip, br"}))
+    return response.status_code, submission_id, accepted_at
+
+
+def wait_for_jobs(timeout):
+    """Wait for the job queue to drain; returns how many jobs are still open."""
+    deadline = time.monotonic() + timeout
+    while True:
+        with closing(portal.db.open_reader()) as conn:
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+        if not pending or time.monotonic() > deadline:
+            return pending
+        time.sleep(0.05)
+
+
+class JobTimer:
+    """Wraps a job handler to time each run and when its submission finished."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.run_seconds = []
+        self.finished_at = {}
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, job):
+        start = time.perf_counter()
+        try:
+            self.handler(job)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+        end = time.perf_counter()
+        with self._lock:
+            self.run_seconds.append(end - start)
+            self.finished_at[job["submission_id"]] = end
+
+
+def run_load(args, fixtures, direct_to=None):
+    photos, signatures = fixtures
+    workload = build_workload(args.submissions, args.duplicate_ratio, args.seed, photos, signatures)
+    recorder = Recorder()
+    clients = threading.local()
+
+    def worker(submission):
+        if not hasattr(clients, "client"):
+            clients.client = portal.app.test_client()
+        return submit(clients.client, recorder, submission, direct_to)
+
+    timer = JobTimer(portal.JOB_HANDLERS["process_submission"])
+    portal.JOB_HANDLERS["process_submission"] = timer
+    portal.start_job_workers()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        outcomes = list(pool.map(worker, workload))
+    request_wall = time.perf_counter() - start
+    pending = wait_for_jobs(args.drain_timeout)
+    drain_wall = time.perf_counter() - start
+
+    statuses = [status for status, _, _ in outcomes]
+    queue_to_done = [
+        timer.finished_at[submission_id] - accepted_at
+        for _, submission_id, accepted_at in outcomes
+        if submission_id in timer.finished_at
+    ]
+
+    return {
+        "submissions": len(workload),
+        "duplicates_sent": sum(s["duplicate"] for s in workload),
+        "accepted": statuses.count(200),
+        "rejected": sum(1 for s in statuses if s != 200),
+        "request_wall_seconds": round(request_wall, 3),
+        "submissions_per_sec": round(len(workload) / request_wall, 2),
+        "routes": {
+            route: dict(summarize(samples, request_wall), statuses=recorder.statuses[route])
+            for route, samples in sorted(recorder.samples.items())
+        },
+        "jobs": {
+            "run": summarize(timer.run_seconds, drain_wall),
+            "accepted_to_done": summarize(queue_to_done),
+            "failed_attempts": timer.failures,
+            "pending_after_drain": pending,
+            "drain_wall_seconds": round(drain_wall, 3),
+        },
+    }
+
+
+# ---------- Microbenchmarks ----------
+def bench(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, sum(samples))
+
+
+def run_micro(args, fixtures):
+    photos, signatures = fixtures
+    data = {
+        "name": "Bench Applicant",
+        "email": "bench@example.com",
+        "role": "CoreTeam",
+        "niche": "Cybersecurity",
+        "sector": "Application Security",
+        "subsector": "",
+        "github_url": "https://github.com/bench",
+        "applied_at": "2025-01-01 00:00:00",
+    }
+
+    def internal_pdf():
+        os.remove(pdf_render.generate_internal_pdf(data, photos[0], signatures[0], "LXBENCH"))
+
+    def receipt_pdf():
+        os.remove(pdf_render.generate_receipt_pdf(data["name"], data["role"], data["email"], "LXBENCH"))
+
+    def validate_images():
+        portal.is_valid_image(io.BytesIO(photos[0]))
+        portal.is_valid_image(io.BytesIO(signatures[0]))
+
+    counter = iter(range(10 ** 9))
+
+    def insert_applicant():
+        n = next(counter)
+        with portal.db.transaction():
+            portal.db.execute("insert_applicant", (
+                f"LXMICRO_{n}", data["name"], f"micro{n}@example.com", data["role"], data["niche"],
+                data["sector"], data["subsector"], data["github_url"], "photo", "signature", True,
+                data["applied_at"]))
+
+    pdf_render.load_pdf_engine()
+    internal_pdf(), receipt_pdf()  # first-call imports and caches stay out of the numbers
+    n = args.micro_iterations
+    return {
+        "generate_internal_pdf": bench(internal_pdf, n),
+        "generate_receipt_pdf": bench(receipt_pdf, n),
+        "is_valid_image": bench(validate_images, n),
+        "insert_applicant": bench(insert_applicant, n),
+    }
+
+
+# ---------- Reporting ----------
+def git_revision():
+    try:
+        return subprocess.run(["git", "-C", REPO_DIR, "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline):
+    """p95 deltas for every route and microbenchmark present in both runs."""
+    rows = []
+    for section in ("routes", "micro"):
+        old_section = baseline.get("load", {}).get(section) if section == "routes" else baseline.get(section)
+        new_section = current["load"]["routes"] if section == "routes" else current.get(section)
+        for name, new in (new_section or {}).items():
+            old = (old_section or {}).get(name)
+            if old and old.get("p95_ms") and new.get("p95_ms"):
+                change = (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+                rows.append((name, old["p95_ms"], new["p95_ms"], round(change, 1)))
+    return rows
+
+
+def print_report(results, deltas):
+    load = results["load"]
+    print(f"\nLoad: {load['submissions']} submissions ({load['duplicates_sent']} duplicates), "
+          f"{load['accepted']} accepted, {load['submissions_per_sec']} submissions/sec")
+    print(f"{'route':<20}{'count':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    for route, s in load["routes"].items():
+        print(f"{route:<20}{s['count']:>7}{s['per_sec']:>9}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}  {s['statuses']}")
+    jobs = load["jobs"]
+    print(f"Jobs: {jobs['run']['count']} done ({jobs['failed_attempts']} failed attempts, "
+          f"{jobs['pending_after_drain']} still open), run p95 {jobs['run']['p95_ms']} ms, "
+          f"accepted-to-done p95 {jobs['accepted_to_done']['p95_ms']} ms, drained in {jobs['drain_wall_seconds']}s")
+    if results.get("micro"):
+        print(f"\n{'microbenchmark':<24}{'ops/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, s in results["micro"].items():
+            print(f"{name:<24}{s['per_sec']:>9}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}")
+    if deltas:
+        print(f"\n{'p95 vs baseline':<24}{'old':>10}{'new':>10}{'change':>9}")
+        for name, old, new, change in deltas:
+            print(f"{name:<24}{old:>10}{new:>10}{change:>+8}%")
+
+
+def build_storage(name, s3):
+    if name == "r2":
+        return portal.R2Storage(client=s3)
+    if name == "write-behind":
+        return portal.WriteBehindStorage(os.path.join(_WORKDIR, "write-behind"), portal.R2Storage(client=s3),
+                                         portal.WRITE_BEHIND_WORKERS)
+    if name == "local":
+        return portal.LocalStorage(os.path.join(_WORKDIR, "storage"))
+    return portal.MemoryStorage()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    parser.add_argument("--storage", choices=("r2", "write-behind", "local", "memory"), default="r2",
+                        help="r2 and write-behind use the offline R2 stand-in")
+    parser.add_argument("--bundles", action="store_true", help="publish each submission as a single bundle")
+    parser.add_argument("--direct-uploads", action="store_true",
+                        help="upload images through presigned PUTs instead of the multipart form")
+    parser.add_argument("--s3-latency-ms", type=float, default=30.0)
+    parser.add_argument("--s3-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--micro-iterations", type=int, default=50)
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare p95 latencies against")
+    args = parser.parse_args()
+
+    output = os.path.join(_ORIGINAL_CWD, args.output)
+    baseline = None
+    if args.baseline:
+        with open(os.path.join(_ORIGINAL_CWD, args.baseline)) as f:
+            baseline = json.load(f)
+
+    s3 = OfflineS3(args.s3_latency_ms, args.s3_jitter_ms)
+    portal.storage = build_storage(args.storage, s3)
+    if args.direct_uploads and not portal.storage.can_presign:
+        parser.error(f"--direct-uploads needs a storage backend that can presign, not {args.storage}")
+    portal.DIRECT_UPLOADS = args.direct_uploads
+    portal.SUBMISSION_BUNDLES = args.bundles
+
+    rng = random.Random(args.seed)
+    fixtures = ([make_photo(rng) for _ in range(4)], [make_signature(rng) for _ in range(4)])
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "params": vars(args),
+            "photo_bytes": [len(p) for p in fixtures[0]],
+            "signature_bytes": [len(s) for s in fixtures[1]],
+        },
+        "load": run_load(args, fixtures, s3 if args.direct_uploads else None),
+    }
+    if args.storage == "write-behind":
+        started = time.perf_counter()
+        drained = portal.storage.drain(args.drain_timeout)
+        results["load"]["write_behind_drain"] = {"drained": drained,
+                                                 "seconds": round(time.perf_counter() - started, 3)}
+    results["load"]["storage"] = portal.storage.stats()
+    results["load"]["s3_requests"] = s3.requests
+    results["load"]["stage_metrics"] = portal.metrics.snapshot()
+    if not args.skip_micro:
+        results["micro"] = run_micro(args, fixtures)
+
+    deltas = compare(results, baseline) if baseline else []
+    if deltas:
+        results["baseline_p95_deltas"] = [
+            {"name": name, "old_p95_ms": old, "new_p95_ms": new, "change_pct": change}
+            for name, old, new, change in deltas
+        ]
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print_report(results, deltas)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
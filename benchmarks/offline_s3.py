@@ -0,0 +1,115 @@
+"""In-process stand-in for the R2 client, with injectable latency.
+
+Implements the subset of the boto3 S3 client API the portal calls. Every
+request sleeps for the configured latency (plus optional jitter) so R2
+round trips show up in timings without touching the network.
+"""
+import io
+import random
+import threading
+import time
+
+
+class OfflineS3Error(Exception):
+    pass
+
+
+class _Body(io.BytesIO):
+    pass
+
+
+class OfflineS3:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, fail_rate=0.0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.fail_rate = fail_rate
+        self.objects = {}
+        self.content_types = {}
+        self.metadata = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _round_trip(self):
+        with self._lock:
+            self.requests += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        if self.fail_rate and random.random() < self.fail_rate:
+            raise OfflineS3Error("injected failure")
+
+    def _missing(self, key, operation):
+        from botocore.exceptions import ClientError
+        return ClientError({"Error": {"Code": "NoSuchKey", "Message": key}}, operation)
+
+    def head_bucket(self, Bucket, **kwargs):
+        self._round_trip()
+        return {}
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, **kwargs):
+        with open(Filename, "rb") as f:
+            self.upload_fileobj(f, Bucket, Key, ExtraArgs)
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None, **kwargs):
+        self.put_object(Bucket, Key, Fileobj.read(), **(ExtraArgs or {}))
+
+    def put_object(self, Bucket, Key, Body=b"", ContentType=None, Metadata=None, **kwargs):
+        self._round_trip()
+        data = Body.read() if hasattr(Body, "read") else bytes(Body)
+        with self._lock:
+            self.objects[Key] = data
+            self.content_types.pop(Key, None)
+            self.metadata.pop(Key, None)
+            if ContentType:
+                self.content_types[Key] = ContentType
+            if Metadata:
+                self.metadata[Key] = dict(Metadata)
+        return {}
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn=3600, **kwargs):
+        # Not signed; put_object with the same key stands in for the browser's PUT
+        return f"https://offline.invalid/{Params['Bucket']}/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+
+    def get_object(self, Bucket, Key, Range=None, **kwargs):
+        self._round_trip()
+        with self._lock:
+            if Key not in self.objects:
+                raise self._missing(Key, "GetObject")
+            data = self.objects[Key]
+        if Range:
+            start, _, end = Range.removeprefix("bytes=").partition("-")
+            data = data[int(start):int(end) + 1 if end else None]
+        return {"Body": _Body(data), "ContentLength": len(data)}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self._round_trip()
+        with self._lock:
+            if Key not in self.objects:
+                raise self._missing(Key, "HeadObject")
+            meta = {"ContentLength": len(self.objects[Key])}
+            if Key in self.content_types:
+                meta["ContentType"] = self.content_types[Key]
+            meta["Metadata"] = self.metadata.get(Key, {})
+            return meta
+
+    def download_file(self, Bucket, Key, Filename, **kwargs):
+        body = self.get_object(Bucket=Bucket, Key=Key)["Body"]
+        with open(Filename, "wb") as f:
+            f.write(body.read())
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self._round_trip()
+        with self._lock:
+            self.objects.pop(Key, None)
+            self.content_types.pop(Key, None)
+            self.metadata.pop(Key, None)
+        return {}
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        self._round_trip()
+        with self._lock:
+            for obj in Delete["Objects"]:
+                self.objects.pop(obj["Key"], None)
+                self.content_types.pop(obj["Key"], None)
+                self.metadata.pop(obj["Key"], None)
+        return {}
@@ -0,0 +1,387 @@
+"""PDF rendering for submissions: the internal application record and the applicant receipt.
+
+Kept apart from app.py so the spawned renderer processes (app.renderer_pool) import only this
+module, reportlab and Pillow. Importing app.py would boot the portal in every renderer: run
+migrations, scan the applicant table, elect a replicator and start storage drainers.
+"""
+import functools
+import hashlib
+import html
+import io
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+log = logging.getLogger(__name__)
+
+# Resolved at import, like app.py's runtime paths; spawned renderers inherit the working directory
+PDF_FOLDER = os.path.abspath("pdfs")
+
+# Photo/signature embedded in the internal PDF, downscaled to this print resolution
+PDF_IMAGE_DPI = int(os.getenv("PDF_IMAGE_DPI", "200"))
+PDF_IMAGE_CACHE_ENTRIES = int(os.getenv("PDF_IMAGE_CACHE_ENTRIES", "256"))
+
+# Bound by load_pdf_engine()
+Image = ImageOps = canvas = colors = pdfmetrics = rl_utils = None
+
+# ---------------- Agreements ----------------
+TEAM_AGREEMENT_TEXT = """LUNVEX LABS – CORE TEAM MEMBER AGREEMENT
+
+This legally binding Agreement (“Agreement”) is entered into on [Date] by and between:
+Lunvex Labs, founded by Dewan Efaj Tahamid Rifat (“the Organization”), and [Full Name] (“the Member”).
+
+1. ENGAGEMENT
+You are appointed as a Core Team Member in your declared Niche and Specialization. This is an indefinite, performance-based engagement.
+
+2. CONFIDENTIALITY
+All non-public information (technical, strategic, or operational) is strictly confidential. Unauthorized disclosure constitutes grounds for immediate termination and legal action.
+
+3. INTELLECTUAL PROPERTY
+All work product, code, designs, or research created during your tenure is the sole and exclusive property of Lunvex Labs.
+
+4. COMPENSATION
+This role is performance-driven. No fixed salary is provided. Rewards (bonuses, equity, or commissions) are discretionary and based on measurable impact.
+
+5. TERMINATION
+- You may resign with 14 days’ written notice.
+- Lunvex Labs reserves the right to terminate immediately for breach of conduct, inactivity (>14 days), or security violations.
+
+6. PROFESSIONAL CONDUCT
+All communication must occur via official Lunvex Labs channels (e.g., verified Telegram: @EfajTahamidRIFAT). Unprofessional behavior is not tolerated.
+
+7. NO GUARANTEE OF SELECTION
+Submission of this application is strictly preliminary and non-binding. It does not constitute acceptance, selection, or any obligation on the part of Lunvex Labs.
+
+8. NON-INVESTOR STATUS
+Applicants acknowledge that participation does not confer equity, ownership, or investor rights. Investment opportunities are separate and require direct qualification.
+
+9. GOVERNING LAW
+This Agreement is governed by the laws of Singapore. Legal notices may be sent via Telegram to @EfajTahamidRIFAT.
+"""
+
+INTERNSHIP_AGREEMENT_TEXT = """LUNVEX LABS – INTERNSHIP AGREEMENT
+
+This educational Agreement (“Agreement”) is entered into on [Date] by and between:
+Lunvex Labs, founded by Dewan Efaj Tahamid Rifat (“the Organization”), and [Full Name] (“the Intern”).
+
+1. TERM
+5-month unpaid internship from [Start Date] to [End Date]. Extension is at the Organization’s sole discretion.
+
+2. PURPOSE
+Hands-on mentorship in your chosen Niche and Specialization to build real-world skills.
+
+3. CONFIDENTIALITY
+All internal materials, tools, and communications are confidential. Disclosure is prohibited during and after the internship.
+
+4. UNPAID NATURE
+This is a voluntary, unpaid educational program. No salary, stipend, or benefits are provided. Successful completion yields an Official Certificate.
+
+5. PATHWAY TO CORE TEAM
+Exceptional performers may receive an invitation to join the Core Team post-internship.
+
+6. TERMINATION
+Lunvex Labs may terminate for misconduct, absenteeism, or breach. You may withdraw with 7 days’ notice.
+
+7. NO GUARANTEE OF SELECTION
+Submission of this application is strictly preliminary and non-binding. It does not constitute acceptance or selection.
+
+8. NON-INVESTOR STATUS
+Applicants acknowledge that participation does not confer equity, ownership, or investor rights.
+
+9. GOVERNING LAW
+This Agreement is governed by the laws of Singapore. Legal notices may be sent via Telegram to @EfajTahamidRIFAT.
+"""
+
+# ---------------- Layout ----------------
+MM = 72 / 25.4
+PAGE_W, PAGE_H = 210 * MM, 297 * MM  # A4
+AGREEMENT_FONT = ("Helvetica", 9)
+AGREEMENT_LEADING = 14
+AGREEMENT_WIDTH = PAGE_W - 100
+AGREEMENT_PLACEHOLDER = re.compile(r"\[(Full Name|Date|Start Date|End Date)\]")
+
+RECEIPT_BAND = (0.05, 0.1, 0.2)
+RECEIPT_SUBTITLE = (0.8, 0.9, 1.0)
+RECEIPT_ACCENT = (0.05, 0.65, 0.9)
+
+@functools.cache
+def load_pdf_engine():
+    # reportlab and Pillow load on the first render (or a warm-up), not when app.py imports us
+    global Image, ImageOps, canvas, colors, pdfmetrics, rl_utils
+    from PIL import Image, ImageOps
+    from reportlab import rl_config
+    from reportlab.lib import colors
+    from reportlab.lib import utils as rl_utils
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfgen import canvas
+    # Binary content streams: smaller PDFs and no pure-Python ASCII85 pass on every save
+    rl_config.useA85 = 0
+
+def wrap_agreement_line(text):
+    if not text.strip():
+        return [""]
+    return rl_utils.simpleSplit(text, *AGREEMENT_FONT, AGREEMENT_WIDTH)
+
+@functools.lru_cache(maxsize=None)
+def agreement_layout(role):
+    # Paragraphs without placeholders are wrapped once per role; the rest per applicant
+    load_pdf_engine()
+    txt = TEAM_AGREEMENT_TEXT if role == "CoreTeam" else INTERNSHIP_AGREEMENT_TEXT
+    blocks = []
+    for para in txt.split('\n'):
+        if AGREEMENT_PLACEHOLDER.search(para):
+            blocks.append((True, para))
+        else:
+            blocks.append((False, tuple(wrap_agreement_line(para))))
+    return tuple(blocks)
+
+def agreement_lines(data):
+    applied_date = data["applied_at"].split()[0]
+    values = {"Full Name": data["name"], "Date": applied_date}
+    if data["role"] == "Internship":
+        end = datetime.fromisoformat(data["applied_at"].replace(' ', 'T')) + timedelta(days=150)
+        values["Start Date"] = applied_date
+        values["End Date"] = end.strftime("%Y-%m-%d")
+    lines = []
+    for templated, content in agreement_layout(data["role"]):
+        if templated:
+            para = AGREEMENT_PLACEHOLDER.sub(lambda m: values.get(m.group(1), m.group(0)), content)
+            lines.extend(wrap_agreement_line(para))
+        else:
+            lines.extend(content)
+    return lines
+
+def _begin_agreement_text(c, y):
+    text = c.beginText(50, y)
+    text.setFont(*AGREEMENT_FONT)
+    text.setLeading(AGREEMENT_LEADING)
+    return text
+
+# Print boxes in points; images are scaled once to fit them at PDF_IMAGE_DPI
+PHOTO_BOX = (35 * MM, 45 * MM)
+SIGNATURE_BOX = (60 * MM, 20 * MM)
+
+_scaled_images = OrderedDict()  # (digest, box) -> (jpeg, size), least recently used first
+_scaled_images_lock = threading.Lock()
+_pdf_stats_lock = threading.Lock()
+_pdf_stats = {
+    "internal_pdfs": 0,
+    "embed_seconds_total": 0.0,
+    "embed_seconds_max": 0.0,
+    "embed_seconds_last": 0.0,
+    "embedded_bytes_total": 0,
+    "scale_cache_hits": 0,
+    "scale_cache_misses": 0,
+}
+
+def _record_pdf_stats(**updates):
+    with _pdf_stats_lock:
+        for key, value in updates.items():
+            if key == "embed_seconds_max":
+                _pdf_stats[key] = max(_pdf_stats[key], value)
+            elif key == "embed_seconds_last":
+                _pdf_stats[key] = value
+            else:
+                _pdf_stats[key] += value
+
+def pdf_stats():
+    with _pdf_stats_lock:
+        stats = dict(_pdf_stats)
+    for key in ("embed_seconds_total", "embed_seconds_max", "embed_seconds_last"):
+        stats[key] = round(stats[key], 6)
+    return stats
+
+def scale_for_print(image_bytes, box):
+    # Returns a small JPEG sized for box at PDF_IMAGE_DPI, cached by content hash
+    key = (hashlib.sha256(image_bytes).digest(), box)
+    with _scaled_images_lock:
+        cached = _scaled_images.get(key)
+        if cached is not None:
+            _scaled_images.move_to_end(key)
+    if cached is not None:
+        _record_pdf_stats(scale_cache_hits=1)
+        return cached
+    _record_pdf_stats(scale_cache_misses=1)
+    target = (round(box[0] / 72 * PDF_IMAGE_DPI), round(box[1] / 72 * PDF_IMAGE_DPI))
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        img.draft("RGB", target)  # JPEG: decode at reduced scale instead of full resolution
+        img = ImageOps.exif_transpose(img)
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            flat = Image.new("RGB", img.size, (255, 255, 255))
+            flat.paste(img, mask=img.getchannel("A"))
+            img = flat
+        else:
+            img = img.convert("RGB")
+        img.thumbnail(target, Image.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, "JPEG", quality=85, optimize=True)
+    scaled = (out.getvalue(), img.size)
+    with _scaled_images_lock:
+        _scaled_images[key] = scaled
+        while len(_scaled_images) > PDF_IMAGE_CACHE_ENTRIES:
+            _scaled_images.popitem(last=False)
+    return scaled
+
+def _draw_scaled_image(c, image_bytes, box, x, top):
+    # Fit inside box keeping aspect ratio, anchored at the top-left corner (x, top)
+    jpeg, (px_w, px_h) = scale_for_print(image_bytes, box)
+    ratio = min(box[0] / px_w, box[1] / px_h)
+    draw_w, draw_h = px_w * ratio, px_h * ratio
+    c.drawImage(rl_utils.ImageReader(io.BytesIO(jpeg)), x, top - draw_h, draw_w, draw_h)
+    c.setStrokeColor(colors.lightgrey)
+    c.rect(x, top - box[1], box[0], box[1], stroke=1, fill=0)
+    return len(jpeg)
+
+def _clip_to_width(text, font, size, width):
+    if pdfmetrics.stringWidth(text, font, size) <= width:
+        return text
+    while text and pdfmetrics.stringWidth(text + "…", font, size) > width:
+        text = text[:-1]
+    return text + "…"
+
+def _define_watermark(c):
+    # Form XObject: stored once per document, referenced from every page
+    c.beginForm("watermark")
+    c.setFont("Helvetica", 40)
+    c.setFillColorRGB(0.9, 0.9, 0.9, 0.5)
+    c.drawCentredString(PAGE_W / 2, PAGE_H / 2, "CONFIDENTIAL")
+    c.endForm()
+
+def generate_internal_pdf(data, photo, signature, submission_id):
+    # photo/signature: original upload bytes (or None to omit them)
+    load_pdf_engine()
+    pdf_path = os.path.join(PDF_FOLDER, f"INTERNAL_{submission_id}.pdf")
+    c = canvas.Canvas(pdf_path, pagesize=(PAGE_W, PAGE_H))
+    w, h = PAGE_W, PAGE_H
+    _define_watermark(c)
+
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, h - 50, "Lunvex Labs – Internal Application Record")
+    c.setFont("Helvetica", 10)
+    c.setFillColor(colors.gray)
+    c.drawString(50, h - 70, f"Submission ID: {submission_id} | {data['applied_at']} UTC")
+
+    y = h - 110
+    c.setFont("Helvetica-Bold", 12)
+    c.setFillColor(colors.black)
+    c.drawString(50, y, "APPLICANT DETAILS")
+    y -= 20
+    c.setFont("Helvetica", 11)
+
+    embed_started = time.perf_counter()
+    embedded_bytes = 0
+    image_x = w - 50 - SIGNATURE_BOX[0]
+    if photo:
+        embedded_bytes += _draw_scaled_image(c, photo, PHOTO_BOX, image_x, h - 100)
+    if signature:
+        embedded_bytes += _draw_scaled_image(c, signature, SIGNATURE_BOX, image_x, h - 110 - PHOTO_BOX[1])
+    embed_seconds = time.perf_counter() - embed_started
+    if photo or signature:
+        _record_pdf_stats(embed_seconds_total=embed_seconds, embed_seconds_max=embed_seconds,
+                          embed_seconds_last=embed_seconds, embedded_bytes_total=embedded_bytes)
+        log.info("Internal PDF %s: embedded %d bytes of images in %.1fms",
+                        submission_id, embedded_bytes, embed_seconds * 1000)
+    _record_pdf_stats(internal_pdfs=1)
+    c.setFillColor(colors.black)
+
+    fields = [
+        ("Name", data["name"]),
+        ("Email", data["email"]),
+        ("GitHub", data["github_url"]),
+        ("Role", "Core Team" if data["role"] == "CoreTeam" else "Intern"),
+        ("Niche", data["niche"]),
+        ("Specialization", data["sector"]),
+        ("Sub-Sector", data.get("subsector") or "N/A"),
+    ]
+    for label, val in fields:
+        c.drawString(50, y, f"{label}:")
+        c.drawString(180, y, _clip_to_width(str(val), "Helvetica", 11, image_x - 190))
+        y -= 20
+
+    # Agreement
+    y = y - 20
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, y, "ACCEPTED AGREEMENT")
+    y -= 25
+
+    text = _begin_agreement_text(c, y)
+    for line in agreement_lines(data):
+        if text.getY() < 60:
+            c.drawText(text)
+            c.doForm("watermark")
+            c.showPage()
+            text = _begin_agreement_text(c, h - 50)
+        text.textLine(line)
+    c.drawText(text)
+
+    # Watermark
+    c.doForm("watermark")
+    c.save()
+    return pdf_path
+
+def generate_receipt_pdf(name, role, email, submission_id):
+    load_pdf_engine()
+    pdf_path = os.path.join(PDF_FOLDER, f"RECEIPT_{submission_id}.pdf")
+    c = canvas.Canvas(pdf_path, pagesize=(PAGE_W, PAGE_H))
+    w, h = PAGE_W, PAGE_H
+
+    c.setFillColorRGB(*RECEIPT_BAND, alpha=0.95)
+    c.rect(0, h - 100, w, 100, fill=1)
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 26)
+    c.drawCentredString(w / 2, h - 50, "LUNVEX LABS")
+    c.setFont("Helvetica", 12)
+    c.setFillColorRGB(*RECEIPT_SUBTITLE)
+    c.drawCentredString(w / 2, h - 75, "Global Technology Initiative")
+
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica-Bold", 18)
+    c.drawCentredString(w / 2, h - 130, "✅ Application Submitted")
+
+    info = [
+        f"Applicant: {html.escape(name)}",
+        f"Pathway: {'Core Team' if role == 'CoreTeam' else 'Internship'}",
+        f"Email: {html.escape(email)}",
+        f"Submission ID: {submission_id}",
+        f"Submitted: {datetime.now(timezone.utc).strftime('%B %d, %Y at %I:%M %p UTC')}"
+    ]
+    text = c.beginText(80, h - 170)
+    text.setFont("Helvetica-Bold", 18)
+    text.setLeading(28)
+    text.textLines(info)
+    c.drawText(text)
+    y = h - 170 - 28 * len(info)
+
+    c.setFont("Helvetica", 12)
+    c.setFillColorRGB(*RECEIPT_ACCENT)
+    c.drawString(80, y - 20, "Next Step:")
+    c.setFont("Helvetica", 11)
+    c.setFillColor(colors.black)
+    c.drawString(80, y - 40, "Contact the Founder on Telegram for confirmation:")
+    c.setFillColor(colors.blue)
+    c.drawString(80, y - 60, "@EfajTahamidRIFAT")
+
+    c.setFillColor(colors.gray)
+    c.setFont("Helvetica", 9)
+    c.drawCentredString(w / 2, 50, "This receipt confirms submission only. No selection is guaranteed.")
+    c.setFillColorRGB(*RECEIPT_ACCENT)
+    c.rect(0, 0, w, 8, fill=1)
+    c.save()
+    return pdf_path
+
+# ---------------- Entry Point ----------------
+def render_submission_pdfs(data, photo, signature, submission_id):
+    # Picklable entry point for process pools (regen-pdfs, the ASGI job runner): reportlab is
+    # pure Python and would serialize on the GIL. Timings come back for the parent's metrics.
+    load_pdf_engine()
+    started = time.perf_counter()
+    internal_pdf = generate_internal_pdf(data, photo, signature, submission_id)
+    rendered = time.perf_counter()
+    receipt_pdf = generate_receipt_pdf(data["name"], data["role"], data["email"], submission_id)
+    timings = {"pdf_internal": rendered - started, "pdf_receipt": time.perf_counter() - rendered}
+    return internal_pdf, receipt_pdf, timings
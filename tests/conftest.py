@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# The app builds itself at import against the working directory; keep it in a scratch one
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("WARMUP_ON_START", "0")
+os.chdir(tempfile.mkdtemp(prefix="lunvex-tests-"))
+
+import app as portal_module  # noqa: E402
+
+
+@pytest.fixture
+def portal():
+    return portal_module
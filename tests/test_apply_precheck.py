@@ -0,0 +1,35 @@
+import secrets
+
+import pytest
+from werkzeug.test import EnvironBuilder
+
+
+def multipart(*parts):
+    boundary = "lunvex-test"
+    body = b""
+    for name, value, filename in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+        body += f"--{boundary}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + value + b"\r\n"
+    body += f"--{boundary}--\r\n".encode()
+    return EnvironBuilder(path="/apply", method="POST", data=body,
+                          content_type=f"multipart/form-data; boundary={boundary}").get_environ()
+
+
+def test_known_applicant_is_refused_before_the_files_are_read(portal, monkeypatch):
+    email = f"{secrets.token_hex(6)}@example.com"
+    applicant_id = f"LX1_{secrets.token_hex(8)}"
+    portal.db_writer.run(lambda: portal.db.execute("insert_applicant", (
+        applicant_id, "Test Applicant", email, "CoreTeam", "Web Development", "Technology", "Software", "",
+        "blobs/aa/photo.jpg", "blobs/bb/signature.png", True, "2025-01-01 00:00:00")))
+
+    def unexpected(*args):
+        raise AssertionError("file part streamed for a known applicant")
+    monkeypatch.setattr(portal.PortalMultiPartParser, "start_file_streaming", unexpected)
+
+    environ = multipart(("csrf_token", portal.issue_csrf_token().encode(), None),
+                        ("role", b"CoreTeam", None),
+                        ("email", f"  {email.upper()} ".encode(), None),
+                        ("photo", b"\x89PNG\r\n\x1a\n", "photo.png"))
+    with portal.app.request_context(environ), pytest.raises(portal.UploadRejected) as e:
+        portal.app.request_class(environ).form
+    assert e.value.reason == "duplicate"
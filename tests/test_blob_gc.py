@@ -0,0 +1,67 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+
+class FakeUpload(io.BytesIO):
+    # Stands in for GuardedUpload: a spooled image that already knows its digest and kind
+    def __init__(self, data):
+        super().__init__(data)
+        self.sha256 = hashlib.sha256(data).hexdigest()
+        self.size = len(data)
+        self.kind = "PNG"
+
+
+def age_blob(portal, digest):
+    with portal.db.transaction():
+        portal.get_db().execute("UPDATE blobs SET created_at = '2000-01-01 00:00:00' WHERE sha256 = ?", (digest,))
+
+
+def blob_row(portal, digest):
+    return portal.get_db().execute("SELECT r2_key, refcount FROM blobs WHERE sha256 = ?", (digest,)).fetchone()
+
+
+def test_gc_never_deletes_bytes_stored_again_while_it_runs(portal, monkeypatch):
+    data = b"\x89PNG\r\n\x1a\n" + os.urandom(64)
+    old_key, = portal.store_blobs([FakeUpload(data)])
+    age_blob(portal, hashlib.sha256(data).hexdigest())
+    delete = portal.storage.delete
+    stored_meanwhile = []
+
+    def racing_delete(keys):
+        # A submission with the same image lands after gc dropped the index row, before the delete
+        if not stored_meanwhile:
+            key, = portal.store_blobs([FakeUpload(data)])
+            with portal.db.transaction():
+                portal.reference_blobs([key])
+            stored_meanwhile.append(key)
+        return delete(keys)
+
+    monkeypatch.setattr(portal.storage, "delete", racing_delete)
+    result = portal.collect_blobs(grace_seconds=0)
+
+    new_key, = stored_meanwhile
+    assert result["deleted"] == 1
+    assert new_key != old_key
+    assert portal.storage.get_bytes(new_key) == data
+    with pytest.raises(portal.ObjectMissing):
+        portal.storage.get_bytes(old_key)
+    assert tuple(blob_row(portal, hashlib.sha256(data).hexdigest())) == (new_key, 1)
+
+
+def test_reference_to_a_collected_generation_is_refused(portal):
+    data = b"\x89PNG\r\n\x1a\n" + os.urandom(64)
+    digest = hashlib.sha256(data).hexdigest()
+    portal.store_blobs([FakeUpload(data)])
+    age_blob(portal, digest)
+    # Looked up before gc runs...
+    stale_key, = portal.store_blobs([FakeUpload(data)])
+    portal.collect_blobs(grace_seconds=0)
+    # ...and the same bytes registered again under a new key before the applicant commits
+    fresh_key, = portal.store_blobs([FakeUpload(data)])
+    assert fresh_key != stale_key
+    with pytest.raises(portal.BlobGone), portal.db.transaction():
+        portal.reference_blobs([stale_key])
+    assert blob_row(portal, digest)["refcount"] == 0
@@ -0,0 +1,64 @@
+import hashlib
+import os
+import secrets
+
+import pytest
+
+
+@pytest.fixture
+def direct(portal, monkeypatch):
+    # MemoryStorage standing in for R2: the "browser" PUTs by writing the granted key directly
+    class PresigningStorage(portal.MemoryStorage):
+        can_presign = True
+
+        def presign_put(self, key, content_type, size, sha256, expires):
+            return f"https://r2.test/{key}", {"Content-Type": content_type}
+
+    storage = PresigningStorage()
+    monkeypatch.setattr(portal, "storage", storage)
+    return storage
+
+
+def png():
+    return b"\x89PNG\r\n\x1a\n" + os.urandom(64)
+
+
+def declare(data):
+    return {"photo": {"type": "image/png", "size": len(data), "sha256": hashlib.sha256(data).hexdigest()}}
+
+
+def upload(portal, storage, data):
+    grant = portal.grant_direct_uploads(declare(data))
+    key = grant["uploads"]["photo"]["url"].split("https://r2.test/", 1)[1]
+    storage.put_bytes(key, data, "image/png")
+    return portal.claim_direct_uploads(grant["upload_id"], ["photo"])["photo"]
+
+
+def test_known_hash_needs_an_upload_like_any_other(portal, direct):
+    data = png()
+    upload(portal, direct, data)
+
+    grant = portal.grant_direct_uploads(declare(data))
+    assert set(grant["uploads"]["photo"]) == {"url", "headers"}
+    # Declaring the digest alone must not attach the stored blob
+    with pytest.raises(portal.UploadClaimFailed) as e:
+        portal.claim_direct_uploads(grant["upload_id"], ["photo"])
+    assert e.value.reason == "upload_missing"
+
+
+def test_verified_upload_of_known_bytes_reuses_the_stored_blob(portal, direct):
+    data = png()
+    stored_key, digest = upload(portal, direct, data)
+
+    key, _ = upload(portal, direct, data)
+    assert key == stored_key
+    assert len([k for k in direct.objects if digest in k]) == 1
+
+
+def test_upload_grants_do_not_spend_submission_tokens(portal):
+    client = f"client-{secrets.token_hex(4)}"
+    burst = int(portal.rate_limiter.burst)
+    assert all(portal.admit_upload_grant(client) for _ in range(burst))
+    assert not portal.admit_upload_grant(client)
+    # The POST /apply that follows each grant still has its whole bucket
+    assert all(portal.admit_submission(client) for _ in range(burst))
@@ -0,0 +1,70 @@
+import secrets
+import sqlite3
+import threading
+
+import pytest
+
+
+def insert(portal, submission_id, email):
+    def work():
+        portal.db.execute("insert_applicant", (
+            submission_id, "Test Applicant", email, "CoreTeam", "Web Development", "Technology", "Software", "",
+            "blobs/aa/photo.jpg", "blobs/bb/signature.png", True, "2025-01-01 00:00:00"))
+        return submission_id
+    return work
+
+
+def applicant_ids(portal, *submission_ids):
+    rows = portal.get_db().execute(
+        f"SELECT submission_id FROM applicants WHERE submission_id IN ({','.join('?' * len(submission_ids))})",
+        submission_ids).fetchall()
+    return {r["submission_id"] for r in rows}
+
+
+@pytest.fixture
+def writer(portal):
+    # A long max_wait so everything submitted together lands in one batch
+    return portal.GroupCommitWriter(portal.db, 64, 0.2)
+
+
+def test_duplicate_mid_batch_rolls_back_alone(portal, writer):
+    email = f"{secrets.token_hex(6)}@example.com"
+    ids = [f"LX1_{secrets.token_hex(8)}" for _ in range(3)]
+    futures = [
+        writer.submit(insert(portal, ids[0], email)),
+        writer.submit(insert(portal, ids[1], email)),  # same (email, role) as the first
+        writer.submit(insert(portal, ids[2], f"{secrets.token_hex(6)}@example.com")),
+    ]
+
+    assert futures[0].result(timeout=5) == ids[0]
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[1].result(timeout=5)
+    assert futures[2].result(timeout=5) == ids[2]
+    assert writer.stats()["batches"] == 1
+    assert applicant_ids(portal, *ids) == {ids[0], ids[2]}
+
+
+def test_writer_survives_an_item_raising_base_exception(portal, writer):
+    class Abort(BaseException):
+        pass
+
+    def work():
+        raise Abort()
+
+    with pytest.raises(Abort):
+        writer.run(work)
+    submission_id = f"LX1_{secrets.token_hex(8)}"
+    assert writer.run(insert(portal, submission_id, f"{secrets.token_hex(6)}@example.com")) == submission_id
+
+
+def test_queued_item_is_withdrawn_when_the_caller_times_out(portal):
+    writer = portal.GroupCommitWriter(portal.db, 1, 0, timeout=0.1)
+    release = threading.Event()
+    stuck = writer.submit(release.wait)
+    submission_id = f"LX1_{secrets.token_hex(8)}"
+    with pytest.raises(portal.GroupCommitTimeout):
+        writer.run(insert(portal, submission_id, f"{secrets.token_hex(6)}@example.com"))
+    release.set()
+    stuck.result(timeout=5)
+    writer.run(lambda: None)  # everything queued before it has been handled
+    assert applicant_ids(portal, submission_id) == set()
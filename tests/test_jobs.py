@@ -0,0 +1,31 @@
+import io
+import json
+import os
+import secrets
+
+import pytest
+from PIL import Image
+
+
+def png():
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "white").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_failed_job_leaves_no_pdfs_behind(portal, monkeypatch):
+    submission_id = f"LX1_{secrets.token_hex(8)}"
+    for key in ("uploads/photo.png", "uploads/signature.png"):
+        portal.storage.put_bytes(key, png(), "image/png")
+    data = {"name": "Test Applicant", "email": "test@example.com", "role": "CoreTeam", "niche": "Web Development",
+            "sector": "Technology", "subsector": "", "github_url": "https://github.com/test", "applied_at": "2025-01-01 00:00:00"}
+    job = {"id": 0, "submission_id": submission_id, "payload": json.dumps(
+        {"data": data, "photo_key": "uploads/photo.png", "signature_key": "uploads/signature.png"})}
+
+    def unreachable(*args):
+        raise ConnectionError("storage unreachable")
+    monkeypatch.setattr(portal, "publish_submission", unreachable)
+
+    with pytest.raises(ConnectionError):
+        portal.process_submission_job(job)
+    assert not [f for f in os.listdir(portal.PDF_FOLDER) if submission_id in f]
@@ -0,0 +1,52 @@
+import os
+import secrets
+
+from werkzeug.http import http_date
+
+
+def cached_receipt(portal):
+    submission_id = f"LX1700000000_{secrets.token_hex(8)}"
+    path, _ = portal.receipts.cache.put(submission_id, b"%PDF-1.4 receipt")
+    os.utime(path, (1700000000, 1700000000))  # written well before it is served
+    return submission_id
+
+
+def test_receipt_needs_the_token_from_the_success_page(portal):
+    submission_id = cached_receipt(portal)
+    client = portal.app.test_client()
+
+    assert client.get(f"/receipt/{submission_id}").status_code == 404
+    assert client.get(f"/receipt/{submission_id}?token=AAAAAAAAAAAAAAAAAAAAAAAA").status_code == 404
+    # A token for another id, or for another purpose, does not carry over
+    other = cached_receipt(portal)
+    assert client.get(f"/receipt/{submission_id}?token={portal.receipt_token(other)}").status_code == 404
+    assert client.get(f"/receipt/{submission_id}?token={portal._csrf_signature(submission_id)}").status_code == 404
+
+    resp = client.get(f"/receipt/{submission_id}?token={portal.receipt_token(submission_id)}")
+    assert resp.status_code == 200
+    assert resp.data == b"%PDF-1.4 receipt"
+
+
+def test_hits_leave_last_modified_alone(portal):
+    submission_id = cached_receipt(portal)
+    client = portal.app.test_client()
+    url = f"/receipt/{submission_id}?token={portal.receipt_token(submission_id)}"
+
+    written = http_date(1700000000)
+    assert client.get(url).headers["Last-Modified"] == written
+    again = client.get(url, headers={"If-Modified-Since": written})
+    assert again.status_code == 304
+    partial = client.get(url, headers={"Range": "bytes=0-3", "If-Range": written})
+    assert partial.status_code == 206
+    assert partial.data == b"%PDF"
+
+
+def test_size_bound_covers_files_written_by_other_workers(portal, tmp_path):
+    first = portal.DiskLRU(str(tmp_path), 250, ".pdf")
+    second = portal.DiskLRU(str(tmp_path), 250, ".pdf")
+    for i in range(3):
+        first.put(f"a{i}", b"x" * 50)
+        second.put(f"b{i}", b"x" * 50)
+
+    assert sum(f.stat().st_size for f in tmp_path.iterdir()) <= 250
+    assert first.get("a0") is None  # the oldest file in the folder went first
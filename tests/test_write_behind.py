@@ -0,0 +1,36 @@
+def start_drainers(storage, workers):
+    # Built with no drainers, so start() only rescanned the markers; this brings them up
+    storage.workers = workers
+    storage.start()
+
+
+def test_key_drained_by_another_process_counts_as_drained(portal, tmp_path):
+    remote = portal.MemoryStorage()
+    first = portal.WriteBehindStorage(str(tmp_path), remote, workers=0)
+    first.put_bytes("receipts/LX1_a.pdf", b"%PDF-1.4 receipt")
+    # A second process sharing the folder picks the same marker up on its rescan
+    second = portal.WriteBehindStorage(str(tmp_path), remote, workers=0)
+    second.start()
+    assert second.stats()["pending"] == 1
+
+    start_drainers(first, 1)
+    assert first.drain(timeout=5)
+    start_drainers(second, 1)
+    assert second.drain(timeout=5)
+
+    assert remote.get_bytes("receipts/LX1_a.pdf") == b"%PDF-1.4 receipt"
+    assert first.stats()["drained"] == 1
+    assert second.stats()["drained"] == 0
+    assert second.stats()["drain_failures"] == 0
+
+
+def test_delete_removes_a_key_pending_in_another_process(portal, tmp_path):
+    remote = portal.MemoryStorage()
+    first = portal.WriteBehindStorage(str(tmp_path), remote, workers=0)
+    first.put_bytes("receipts/LX1_b.pdf", b"%PDF-1.4 receipt")
+    second = portal.WriteBehindStorage(str(tmp_path), remote, workers=0)
+    second.delete(["receipts/LX1_b.pdf"])
+
+    start_drainers(first, 1)
+    assert first.drain(timeout=5)
+    assert "receipts/LX1_b.pdf" not in remote.objects